@@ -0,0 +1,60 @@
+import asyncio
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.database import Base
+import app.models.orm  # noqa: F401  (enregistre les tables)
+import app.models.auth  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+# Tables du CMS créées par init_database en SQL brut, hors des métadonnées
+CMS_TABLES = {"pages_content", "services", "faq"}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # L'autogénération ne doit ni proposer de les supprimer, ni les modifier.
+    if type_ == "table" and (name in CMS_TABLES or (reflected and compare_to is None)):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
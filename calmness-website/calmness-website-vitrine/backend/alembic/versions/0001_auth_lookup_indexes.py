@@ -0,0 +1,52 @@
+"""auth lookup indexes
+
+Partial / composite indexes for the 2FA code and session lookups, and the
+user_sessions.last_seen_at column written by the session store. The tables
+are created by create_all at startup; on a database where they do not exist
+yet there is nothing to do, create_all builds them from the models with the
+same indexes.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Same definitions as the __table_args__ of app/models/auth.py
+INDEXES = {
+    "ix_user_sessions_active_token":
+        ("user_sessions", "(session_token) INCLUDE (id, user_id, expires_at) WHERE is_active"),
+    "ix_user_sessions_user_active": ("user_sessions", "(user_id) WHERE is_active"),
+    "ix_user_sessions_expires_at": ("user_sessions", "(expires_at)"),
+    "ix_two_factor_codes_pending":
+        ("two_factor_codes", "(user_id, code_type, code, expires_at) WHERE NOT is_used"),
+    "ix_two_factor_codes_expires_at": ("two_factor_codes", "(expires_at)"),
+}
+
+
+def _exists(table: str) -> bool:
+    return op.get_bind().execute(sa.text("SELECT to_regclass(:t)"), {"t": table}).scalar() is not None
+
+
+def upgrade() -> None:
+    if _exists("user_sessions"):
+        op.execute("ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP WITH TIME ZONE")
+    # Built without locking out writes on a live database
+    with op.get_context().autocommit_block():
+        for name, (table, definition) in INDEXES.items():
+            if _exists(table):
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    if _exists("user_sessions"):
+        op.execute("ALTER TABLE user_sessions DROP COLUMN IF EXISTS last_seen_at")
@@ -0,0 +1,30 @@
+"""rate limit counters
+
+Shared counters of the postgres rate limiter backend.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if create_all ran at startup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS rate_limit_counters (
+            key VARCHAR(255) NOT NULL,
+            window_start BIGINT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (key, window_start)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS rate_limit_counters")
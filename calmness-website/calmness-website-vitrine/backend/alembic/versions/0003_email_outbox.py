@@ -0,0 +1,41 @@
+"""email outbox
+
+Persistent queue of outgoing emails drained by the outbox worker.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if create_all ran at startup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id SERIAL PRIMARY KEY,
+            recipient VARCHAR(255) NOT NULL,
+            subject VARCHAR(255) NOT NULL,
+            html_body TEXT NOT NULL,
+            text_body TEXT,
+            status VARCHAR(20) NOT NULL,
+            attempts INTEGER NOT NULL,
+            next_attempt_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            sent_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_email_outbox_pending
+        ON email_outbox (next_attempt_at) WHERE status = 'pending'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS email_outbox")
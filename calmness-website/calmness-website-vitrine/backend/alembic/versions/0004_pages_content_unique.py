@@ -0,0 +1,39 @@
+"""pages_content unique (page, section)
+
+One-off cleanup of duplicate page sections, then the unique index the
+set-based upsert of POST /api/pages/{page} relies on. pages_content is a
+CMS table created by init_database; nothing to do if it does not exist yet.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('pages_content') IS NOT NULL THEN
+                -- Keep the most recent row of each (page, section)
+                DELETE FROM pages_content a
+                USING pages_content b
+                WHERE a.page = b.page AND a.section = b.section AND a.id < b.id;
+
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_pages_content_page_section
+                ON pages_content (page, section);
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    # Deleted duplicates are not restored
+    op.execute("DROP INDEX IF EXISTS uq_pages_content_page_section")
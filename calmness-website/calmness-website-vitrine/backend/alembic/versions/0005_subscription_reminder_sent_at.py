@@ -0,0 +1,32 @@
+"""subscriptions.reminder_sent_at
+
+Marks the subscriptions already sent their J-2 expiry reminder.
+subscriptions is created by create_all at startup; nothing to do if it does
+not exist yet.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('subscriptions') IS NOT NULL THEN
+                ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS reminder_sent_at TIMESTAMP WITHOUT TIME ZONE;
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE IF EXISTS subscriptions DROP COLUMN IF EXISTS reminder_sent_at")
@@ -0,0 +1,56 @@
+"""CMS timestamps in UTC
+
+pages_content, services and faq defaulted to CURRENT_TIMESTAMP, which a
+TIMESTAMP WITHOUT TIME ZONE column stores in the server's local time, while
+Last-Modified / If-Modified-Since read them as UTC. The defaults become
+timezone('utc', now()) and existing values are converted from the session
+time zone (the one they were written in) to UTC; a no-op on a UTC server.
+Tables created by init_database; nothing to do for those that do not exist.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TABLES = ("pages_content", "services", "faq")
+
+
+def _for_each_table(statements: str) -> None:
+    for table in TABLES:
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF to_regclass('{table}') IS NOT NULL THEN
+                    {statements.format(table=table)}
+                END IF;
+            END
+            $$
+        """)
+
+
+def upgrade() -> None:
+    _for_each_table("""
+        ALTER TABLE {table}
+            ALTER COLUMN created_at SET DEFAULT timezone('utc', now()),
+            ALTER COLUMN updated_at SET DEFAULT timezone('utc', now());
+        UPDATE {table} SET
+            created_at = timezone('utc', created_at AT TIME ZONE current_setting('TimeZone')),
+            updated_at = timezone('utc', updated_at AT TIME ZONE current_setting('TimeZone'));
+    """)
+
+
+def downgrade() -> None:
+    _for_each_table("""
+        ALTER TABLE {table}
+            ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP,
+            ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+        UPDATE {table} SET
+            created_at = timezone(current_setting('TimeZone'), created_at AT TIME ZONE 'UTC'),
+            updated_at = timezone(current_setting('TimeZone'), updated_at AT TIME ZONE 'UTC');
+    """)
@@ -1,19 +1,30 @@
 import os
+import asyncio
 import secrets
 import pyotp
 import qrcode
+import qrcode.image.svg
 import io
 import base64
+import hashlib
+from time import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.auth import User, UserSession, TwoFactorCode
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.database import get_db, AsyncSessionLocal
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.auth import User, TwoFactorCode
 from app.schemas.auth import UserResponse
+from app.core.hashing import password_hasher
+from app.core.sessions import session_store
+from app.core.totp import totp_verifier
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -21,19 +32,49 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # JWT Security
 security = HTTPBearer()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+# Verified token payloads keyed by (type, token digest); each entry expires
+# with the token's own `exp`.
+_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_ENTRIES, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Column values of recently authenticated users keyed by `sub`, so the
+# principal can be rebuilt without a query. Short-lived, and invalidated on
+# every worker when credentials change and on session revocation.
+_principal_cache = session_store.principals
+
+# 2FA setup QR codes, rendered off the event loop and kept for the setup
+# flow keyed by (secret, email, format) so retries are not re-rendered
+_qr_executor = ThreadPoolExecutor(max_workers=settings.QR_CODE_WORKERS, thread_name_prefix="qr-code")
+_qr_cache = TTLCache(maxsize=settings.QR_CODE_CACHE_MAX_ENTRIES, ttl=settings.QR_CODE_CACHE_TTL)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (on the hashing pool)"""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
+    """Hash a password (on the hashing pool)"""
+    return await password_hasher.hash(password)
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a stored hash uses outdated parameters"""
+    return password_hasher.needs_update(hashed_password)
+
+async def rehash_password(user_id: int, password: str, old_hash: str) -> None:
+    """Upgrade a stored hash after a successful login (background task).
+    The update is skipped if the password changed in the meantime."""
+    try:
+        new_hash = await get_password_hash(password)
+    except HTTPException:
+        return  # hashing pool saturated, retry on next login
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
@@ -57,23 +98,51 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
 
 def verify_token(token: str, token_type: str = "access") -> Dict[str, Any]:
     """Verify and decode a JWT token"""
+    cache_key = (token_type, hashlib.sha256(token.encode()).digest())
+    payload = _token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("type") != token_type:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type"
-            )
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
+    if payload.get("type") != token_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token type"
+        )
+    
+    remaining = payload.get("exp", 0) - time()
+    if remaining > 0:
+        _token_cache.set(cache_key, payload, ttl=remaining)
+    return payload
+
+def _user_snapshot(user: User) -> Dict[str, Any]:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+async def _user_from_snapshot(db: AsyncSession, values: Dict[str, Any]) -> User:
+    # Attach a copy to this request's session without querying it
+    user = User(**values)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+def invalidate_user_principal(user_id: int) -> None:
+    """Drop the cached principal so the next request reloads the user"""
+    _principal_cache.invalidate(str(user_id))
+
+async def commit_user_change(db: AsyncSession, user_id: int) -> None:
+    """Commit a change to a user and drop its cached principal on every worker"""
+    await session_store.publish_user_change(db, user_id)
+    await db.commit()
+    invalidate_user_principal(user_id)
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get the current authenticated user"""
     token = credentials.credentials
@@ -86,7 +155,13 @@ def get_current_user(
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user_id = str(user_id)
+    snapshot = _principal_cache.get(user_id)
+    if snapshot is not None:
+        return await _user_from_snapshot(db, snapshot)
+    
+    result = await db.execute(select(User).where(User.id == int(user_id)))
+    user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -99,9 +174,10 @@ def get_current_user(
             detail="User account is disabled"
         )
     
+    _principal_cache.set(user_id, _user_snapshot(user))
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user"""
     if not current_user.is_active:
         raise HTTPException(
@@ -115,30 +191,45 @@ def generate_2fa_secret() -> str:
     """Generate a new 2FA secret"""
     return pyotp.random_base32()
 
-def generate_2fa_qr_code(secret: str, email: str) -> str:
-    """Generate QR code for 2FA setup"""
+def _render_2fa_qr_code(secret: str, email: str, fmt: str) -> str:
+    """Render the provisioning QR code as a data URL (CPU-bound, runs on _qr_executor)"""
     totp_uri = pyotp.totp.TOTP(secret).provisioning_uri(
         name=email,
         issuer_name="Calmness FI"
     )
     
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(totp_uri)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        # Path-based SVG: no raster image, no PNG encoding
+        qr = qrcode.QRCode(version=1, box_size=10, border=5, image_factory=qrcode.image.svg.SvgPathImage)
+        qr.add_data(totp_uri)
+        qr.make(fit=True)
+        qr.make_image().save(buffer)
+        mime = "image/svg+xml"
+    else:
+        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(totp_uri)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format='PNG')
+        mime = "image/png"
     
     # Convert to base64
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
     img_str = base64.b64encode(buffer.getvalue()).decode()
     
-    return f"data:image/png;base64,{img_str}"
+    return f"data:{mime};base64,{img_str}"
 
-def verify_2fa_code(secret: str, code: str) -> bool:
-    """Verify a 2FA code"""
-    totp = pyotp.TOTP(secret)
-    return totp.verify(code, valid_window=1)
+async def generate_2fa_qr_code(secret: str, email: str, fmt: str = "png") -> str:
+    """Generate QR code for 2FA setup (cached for the duration of the setup flow)"""
+    loop = asyncio.get_running_loop()
+    return await _qr_cache.get_or_load(
+        (secret, email, fmt),
+        lambda: loop.run_in_executor(_qr_executor, _render_2fa_qr_code, secret, email, fmt)
+    )
+
+def verify_2fa_code(user_id: int, secret: str, code: str) -> bool:
+    """Verify a 2FA code (throttled per user, replays rejected)"""
+    return totp_verifier.verify(user_id, secret, code)
 
 def generate_backup_codes() -> list:
     """Generate backup codes for 2FA"""
@@ -149,16 +240,20 @@ def generate_sms_code() -> str:
     """Generate a 6-digit SMS code"""
     return f"{secrets.randbelow(900000) + 100000:06d}"
 
-def create_2fa_code(db: Session, user_id: int, code: str, code_type: str, phone_number: str = None) -> TwoFactorCode:
+async def create_2fa_code(db: AsyncSession, user_id: int, code: str, code_type: str, phone_number: str = None) -> TwoFactorCode:
     """Create a 2FA code in the database"""
     expires_at = datetime.utcnow() + timedelta(minutes=10)
     
     # Deactivate old codes
-    db.query(TwoFactorCode).filter(
-        TwoFactorCode.user_id == user_id,
-        TwoFactorCode.code_type == code_type,
-        TwoFactorCode.is_used == False
-    ).update({"is_used": True})
+    await db.execute(
+        update(TwoFactorCode)
+        .where(
+            TwoFactorCode.user_id == user_id,
+            TwoFactorCode.code_type == code_type,
+            TwoFactorCode.is_used == False
+        )
+        .values(is_used=True)
+    )
     
     # Create new code
     two_factor_code = TwoFactorCode(
@@ -170,67 +265,55 @@ def create_2fa_code(db: Session, user_id: int, code: str, code_type: str, phone_
     )
     
     db.add(two_factor_code)
-    db.commit()
-    db.refresh(two_factor_code)
+    await db.commit()
+    await db.refresh(two_factor_code)
     
     return two_factor_code
 
-def verify_2fa_code_db(db: Session, user_id: int, code: str, code_type: str) -> bool:
+async def verify_2fa_code_db(db: AsyncSession, user_id: int, code: str, code_type: str) -> bool:
     """Verify a 2FA code from the database"""
-    two_factor_code = db.query(TwoFactorCode).filter(
+    result = await db.execute(select(TwoFactorCode).where(
         TwoFactorCode.user_id == user_id,
         TwoFactorCode.code == code,
         TwoFactorCode.code_type == code_type,
         TwoFactorCode.is_used == False,
         TwoFactorCode.expires_at > datetime.utcnow()
-    ).first()
+    ).limit(1))
+    two_factor_code = result.scalar_one_or_none()
     
     if two_factor_code:
         two_factor_code.is_used = True
-        db.commit()
+        await db.commit()
         return True
     
     return False
 
 # Session Management
-def create_user_session(db: Session, user_id: int, device_info: str = None, ip_address: str = None) -> str:
-    """Create a new user session"""
-    session_token = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    
-    user_session = UserSession(
-        user_id=user_id,
-        session_token=session_token,
-        device_info=device_info,
-        ip_address=ip_address,
-        expires_at=expires_at
+async def create_user_session(db: AsyncSession, user_id: int, device_info: str = None, ip_address: str = None) -> str:
+    """Create a new user session (also records the login)"""
+    return await session_store.create(
+        db, user_id, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS), device_info, ip_address
     )
-    
-    db.add(user_session)
-    db.commit()
-    db.refresh(user_session)
-    
-    return session_token
 
-def verify_session_token(db: Session, session_token: str) -> Optional[User]:
+async def verify_session_token(db: AsyncSession, session_token: str) -> Optional[User]:
     """Verify a session token and return the user"""
-    session = db.query(UserSession).filter(
-        UserSession.session_token == session_token,
-        UserSession.is_active == True,
-        UserSession.expires_at > datetime.utcnow()
-    ).first()
+    session = await session_store.lookup(db, session_token)
+    if session is None:
+        return None
     
-    if session:
-        return session.user
-    return None
+    snapshot = _principal_cache.get(str(session.user_id))
+    if snapshot is not None:
+        return await _user_from_snapshot(db, snapshot)
+    
+    user = await db.get(User, session.user_id)
+    if user is not None:
+        _principal_cache.set(str(session.user_id), _user_snapshot(user))
+    return user
 
-def revoke_user_sessions(db: Session, user_id: int) -> None:
+async def revoke_user_sessions(db: AsyncSession, user_id: int) -> None:
     """Revoke all sessions for a user"""
-    db.query(UserSession).filter(
-        UserSession.user_id == user_id,
-        UserSession.is_active == True
-    ).update({"is_active": False})
-    db.commit()
+    await session_store.revoke_user(db, user_id)
+    invalidate_user_principal(user_id)
 
 # Email verification
 def generate_email_verification_token() -> str:
@@ -0,0 +1,153 @@
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from app.core.config import settings
+
+
+class TTLCache:
+    """Bounded in-process cache: entries expire after `ttl` seconds and the
+    least recently used entry is evicted once `maxsize` is reached.
+
+    With `stale_ttl`, `get_or_load` keeps serving an expired value for that
+    many extra seconds while a single background task refreshes it.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # key -> (fresh_until, stale_until, value)
+        self._data: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        # key -> task currently loading it (single-flight)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        fresh_until, _, value = entry
+        if fresh_until <= monotonic():
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def contains(self, key: Hashable) -> bool:
+        """True if `get_or_load` would answer without waiting for a load."""
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > monotonic()
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        fresh_until = monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (fresh_until, fresh_until + self.stale_ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """Read-through lookup. Concurrent misses for the same key share one
+        `loader()` call; a stale value is returned immediately while one
+        background task refreshes it. `loader` must not depend on the
+        caller's request scope (e.g. its DB session). `ttl` overrides the
+        cache default for the loaded value."""
+        entry = self._data.get(key)
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            now = monotonic()
+            if now < fresh_until:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            if now < stale_until:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_load(key, loader, ttl, background=True)
+                return value
+            del self._data[key]
+
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start_load(key, loader, ttl, background=False)
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the load shared with others
+        return await asyncio.shield(task)
+
+    def _start_load(self, key: Hashable, loader, ttl: Optional[float], background: bool) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader, ttl))
+        self._inflight[key] = task
+        if background:
+            task.add_done_callback(self._report_refresh_failure)
+        return task
+
+    async def _load(self, key: Hashable, loader, ttl: Optional[float]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            # Only store if no invalidation happened while loading
+            if self._inflight.get(key) is task:
+                self.set(key, value, ttl)
+            return value
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    @staticmethod
+    def _report_refresh_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Cache refresh error: {task.exception()}")
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "evictions": self.evictions,
+        }
+
+
+# Cache keys for the public CMS content
+SERVICES_KEY = "services"
+FAQ_KEY = "faq"
+# Every page + services + FAQ, see GET /api/snapshot. Kept until a write
+# invalidates it; SNAPSHOT_CACHE_TTL only bounds a missed notification.
+SNAPSHOT_KEY = "snapshot"
+
+
+def page_key(page: str) -> str:
+    return f"page:{page}"
+
+
+content_cache = TTLCache(
+    maxsize=settings.CONTENT_CACHE_MAX_ENTRIES,
+    ttl=settings.CONTENT_CACHE_TTL,
+    stale_ttl=settings.CONTENT_CACHE_STALE_TTL,
+)
@@ -11,6 +11,20 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_PORT: str
 
+    # Database connection pool (shared by the ORM and the CMS routes)
+    DB_POOL_MIN_SIZE: int = 5  # connections kept open and warmed at startup
+    DB_POOL_MAX_SIZE: int = 20  # hard cap, overflow included
+    DB_POOL_TIMEOUT: float = 10.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_ECHO: bool = False
+
+    # Public content cache (pages, services, FAQ)
+    CONTENT_CACHE_TTL: float = 300.0  # seconds
+    CONTENT_CACHE_MAX_ENTRIES: int = 256
+    CONTENT_CACHE_STALE_TTL: float = 60.0  # seconds an expired entry may still be served while refreshing
+    SNAPSHOT_CACHE_TTL: float = 86400.0  # safety net only, the snapshot is invalidated on every write
+    CACHE_INVALIDATION_CHANNEL: str = "calmness_cache"  # LISTEN/NOTIFY channel
+
     # API Configuration
     API_V1_STR: str = "/api"
     PROJECT_NAME: str = "Calmness FI Backend"
@@ -21,6 +35,67 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Authentication caches
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # verified access tokens
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 30.0  # seconds a user may be served without a query
+
+    # 2FA setup QR codes
+    QR_CODE_WORKERS: int = 2
+    QR_CODE_CACHE_TTL: float = 600.0  # seconds, covers the setup flow
+    QR_CODE_CACHE_MAX_ENTRIES: int = 1000
+
+    # TOTP verification (see app/core/totp.py)
+    TOTP_MAX_ATTEMPTS: int = 5  # failed codes per user before answering 429
+    TOTP_ATTEMPT_WINDOW: float = 300.0  # seconds
+    TOTP_VALID_WINDOW: int = 1  # accepted clock drift, in 30 s steps
+    TOTP_CACHE_MAX_ENTRIES: int = 10000
+
+    # Rate limiting (see app/core/limiter.py)
+    RATE_LIMIT_ENABLED: bool = True  # policy table in app/main.py
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker), "shm" (per host) or "postgres" (shared)
+    RATE_LIMIT_MAX_KEYS: int = 100000  # buckets kept in memory, LRU beyond
+    RATE_LIMIT_SHM_PATH: str = "/dev/shm/calmness_ratelimit"
+    RATE_LIMIT_SHM_SLOTS: int = 65536  # fixed-size table, 32 bytes per slot
+    RATE_LIMIT_SYNC_INTERVAL: float = 0.5  # seconds between postgres counter syncs
+
+    # Outgoing email queue (see app/core/outbox.py)
+    EMAIL_BATCH_SIZE: int = 50  # rows claimed per batch
+    EMAIL_CONCURRENCY: int = 4  # SMTP connections, and so messages in flight
+    EMAIL_MAX_ATTEMPTS: int = 5  # before a message is marked failed
+    EMAIL_RETRY_BASE: float = 30.0  # seconds, doubled after every failed attempt
+    EMAIL_POLL_INTERVAL: float = 5.0  # seconds between polls when the queue is empty
+    EMAIL_LEASE_SECONDS: float = 300.0  # claimed rows are retried after this if never acknowledged
+    EMAIL_SMTP_IDLE_TIMEOUT: float = 60.0  # seconds before an unused SMTP connection is closed
+
+    # 2FA SMS (see app/core/sms.py); credentials come from TWILIO_*
+    SMS_API_BASE_URL: str = "https://api.twilio.com"  # point to a local fake endpoint for tests
+    SMS_TIMEOUT: float = 10.0  # seconds
+    SMS_MAX_CONNECTIONS: int = 10  # pooled keep-alive connections
+    SMS_MAX_PER_NUMBER: int = 3  # messages per destination number...
+    SMS_THROTTLE_WINDOW: float = 600.0  # ...per this many seconds
+
+    # User sessions (see app/core/sessions.py)
+    SESSION_CACHE_TTL: float = 60.0  # seconds a session token is trusted without a query
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    SESSION_FLUSH_INTERVAL: float = 30.0  # seconds between batched last_seen/last_login writes
+    SESSION_INVALIDATION_CHANNEL: str = "calmness_sessions"  # revocations across workers
+
+    # Cleanup of dead user_sessions / two_factor_codes rows (see scheduler.reaper_loop)
+    REAPER_INTERVAL: float = 3600.0  # seconds between passes
+    REAPER_BATCH_SIZE: int = 1000  # rows deleted per transaction
+    REAPER_MAX_BATCHES: int = 100  # per table and per pass
+    REAPER_BATCH_PAUSE: float = 0.1  # seconds between two batches
+
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # waiting hashes before answering 503
+    # Target bcrypt latency; the cost is calibrated at startup when set
+    PASSWORD_HASH_TARGET_MS: Optional[float] = None
+    PASSWORD_HASH_MIN_ROUNDS: int = 10
+    PASSWORD_HASH_MAX_ROUNDS: int = 16
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -33,6 +108,10 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 10485760  # 10MB
 
+    # Static export of the public content (see export_static.py)
+    EXPORT_DIR: str = "./public_content"
+    EXPORT_ON_WRITE: bool = False  # re-export after every admin write
+
     @property
     def DATABASE_URL(self) -> str:
         return (
@@ -46,3 +125,4 @@ settings = Settings()
 
 # Create upload directory if it doesn't exist
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+os.makedirs(settings.EXPORT_DIR, exist_ok=True)
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Read side of the public CMS content. Each loader returns
+# (payload, newest updated_at, row count) so callers can derive validators.
+Loaded = Tuple[Dict[str, Any], Optional[datetime], int]
+
+COLLECTIONS = ("services", "faq")
+
+PAGE_VERSION_SQL = "SELECT max(updated_at) AS updated_at, count(*) AS count FROM pages_content WHERE page = :page"
+SERVICES_VERSION_SQL = "SELECT max(updated_at) AS updated_at, count(*) AS count FROM services"
+FAQ_VERSION_SQL = "SELECT max(updated_at) AS updated_at, count(*) AS count FROM faq"
+SNAPSHOT_VERSION_SQL = """
+    SELECT greatest(p.updated_at, s.updated_at, f.updated_at) AS updated_at,
+           p.count + s.count + f.count AS count
+    FROM (SELECT max(updated_at) AS updated_at, count(*) AS count FROM pages_content) p,
+         (SELECT max(updated_at) AS updated_at, count(*) AS count FROM services) s,
+         (SELECT max(updated_at) AS updated_at, count(*) AS count FROM faq) f
+"""
+
+
+def _newest(rows) -> Optional[datetime]:
+    return max((row['updated_at'] for row in rows if row['updated_at']), default=None)
+
+
+async def list_pages(session: AsyncSession) -> List[str]:
+    result = await session.execute(text("SELECT DISTINCT page FROM pages_content ORDER BY page"))
+    return list(result.scalars())
+
+
+async def load_page(session: AsyncSession, page: str) -> Loaded:
+    result = await session.execute(
+        text("SELECT section, content, updated_at FROM pages_content WHERE page = :page ORDER BY section"),
+        {"page": page}
+    )
+    rows = result.mappings().all()
+    
+    # Convert to dict format
+    content = {}
+    for row in rows:
+        content[row['section']] = row['content']
+    
+    return {"data": content}, _newest(rows), len(rows)
+
+
+async def load_collection(session: AsyncSession, table: str) -> Loaded:
+    if table not in COLLECTIONS:
+        raise ValueError(f"Unknown collection: {table}")
+    result = await session.execute(text(f"SELECT * FROM {table} ORDER BY \"order\""))
+    rows = [dict(row) for row in result.mappings()]
+    return {"data": rows}, _newest(rows), len(rows)
+
+
+async def load_snapshot(session: AsyncSession) -> Loaded:
+    """Every page's sections, the services and the FAQ, one query per table"""
+    result = await session.execute(text("SELECT page, section, content, updated_at FROM pages_content ORDER BY page, section"))
+    rows = result.mappings().all()
+    pages: Dict[str, Dict[str, str]] = {}
+    for row in rows:
+        pages.setdefault(row['page'], {})[row['section']] = row['content']
+    
+    services, services_updated, services_count = await load_collection(session, "services")
+    faq, faq_updated, faq_count = await load_collection(session, "faq")
+    
+    payload = {"data": {"pages": pages, "services": services["data"], "faq": faq["data"]}}
+    updated_at = max((u for u in (_newest(rows), services_updated, faq_updated) if u), default=None)
+    return payload, updated_at, len(rows) + services_count + faq_count
@@ -0,0 +1,217 @@
+import os
+from html import escape
+from string import Template
+from typing import Dict, NamedTuple, Tuple
+from app.core.outbox import OutgoingEmail
+
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+# Shared by every email; inlined into each template when it is compiled
+STYLE = """
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
+        .button { display: inline-block; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
+        .footer { text-align: center; margin-top: 30px; color: #666; font-size: 14px; }
+        .link { word-break: break-all; background: #eee; padding: 10px; border-radius: 5px; }
+        .warning { background: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 5px; margin: 20px 0; }
+        .feature { background: white; padding: 20px; margin: 15px 0; border-radius: 5px; border-left: 4px solid #667eea; }
+"""
+
+LAYOUT = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>$title</title>
+    <style>$style</style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+$header
+        </div>
+        <div class="content">
+$content
+        </div>
+        <div class="footer">
+            <p>© 2024 Calmness FI. Tous droits réservés.</p>
+            <p>Cet email a été envoyé automatiquement, merci de ne pas y répondre.</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+TEXT_FOOTER = """
+--
+© 2024 Calmness FI. Tous droits réservés.
+Cet email a été envoyé automatiquement, merci de ne pas y répondre.
+"""
+
+
+class _Compiled(NamedTuple):
+    literals: Tuple[str, ...]  # one more than fields
+    fields: Tuple[str, ...]
+
+    def fill(self, values: Dict[str, str]) -> str:
+        if not self.fields:
+            return self.literals[0]
+        parts = [self.literals[0]]
+        for name, literal in zip(self.fields, self.literals[1:]):
+            parts.append(values[name])
+            parts.append(literal)
+        return "".join(parts)
+
+
+def _compile(source: str, constants: Dict[str, str]) -> _Compiled:
+    """Split a `string.Template` source into literal chunks and field names,
+    with the constants already merged into the chunks, so that rendering is a
+    single join instead of a regex pass over the whole document."""
+    literals = [""]
+    fields = []
+    position = 0
+    for match in Template.pattern.finditer(source):
+        literals[-1] += source[position:match.start()]
+        name = match.group("named") or match.group("braced")
+        if match.group("escaped") is not None:
+            literals[-1] += "$"
+        elif name in constants:
+            literals[-1] += constants[name]
+        elif name is not None:
+            fields.append(name)
+            literals.append("")
+        else:
+            raise ValueError(f"Invalid placeholder in email template at {match.start()}")
+        position = match.end()
+    literals[-1] += source[position:]
+    return _Compiled(tuple(literals), tuple(fields))
+
+
+class EmailTemplate:
+    """An email compiled once: the layout, CSS and constant values are
+    substituted when the template is built, so rendering only fills in the
+    per-recipient fields. Fields are HTML-escaped in the HTML part only."""
+
+    def __init__(self, subject: str, title: str, header: str, content: str, text: str):
+        self.subject = subject
+        constants = {"frontend_url": FRONTEND_URL}
+        html = LAYOUT.substitute(title=title, style=STYLE, header=header, content=content)
+        self.html = _compile(html, constants)
+        self.text = _compile(text + TEXT_FOOTER, constants)
+
+    def render(self, recipient: str, **fields: str) -> OutgoingEmail:
+        return OutgoingEmail(
+            recipient,
+            self.subject,
+            self.html.fill({k: escape(v) for k, v in fields.items()}),
+            self.text.fill(fields)
+        )
+
+
+EMAIL_VERIFICATION = EmailTemplate(
+    subject="Vérification de votre compte Calmness FI",
+    title="Vérification de votre compte Calmness FI",
+    header="""            <h1>🎯 Calmness FI</h1>
+            <h2>Vérification de votre compte</h2>""",
+    content="""            <p>Bonjour <strong>$username</strong>,</p>
+            <p>Merci de vous être inscrit sur Calmness FI ! Pour activer votre compte, veuillez cliquer sur le bouton ci-dessous :</p>
+            <p style="text-align: center;">
+                <a href="$url" class="button">Vérifier mon compte</a>
+            </p>
+            <p>Si le bouton ne fonctionne pas, copiez et collez ce lien dans votre navigateur :</p>
+            <p class="link">$url</p>
+            <p>Ce lien est valide pendant 24 heures.</p>
+            <p>Si vous n'avez pas créé de compte sur Calmness FI, vous pouvez ignorer cet email.</p>""",
+    text="""Bonjour $username,
+
+Merci de vous être inscrit sur Calmness FI ! Pour activer votre compte, ouvrez ce lien dans votre navigateur :
+
+$url
+
+Ce lien est valide pendant 24 heures.
+Si vous n'avez pas créé de compte sur Calmness FI, vous pouvez ignorer cet email.
+"""
+)
+
+PASSWORD_RESET = EmailTemplate(
+    subject="Réinitialisation de votre mot de passe - Calmness FI",
+    title="Réinitialisation de votre mot de passe",
+    header="""            <h1>🔐 Calmness FI</h1>
+            <h2>Réinitialisation de mot de passe</h2>""",
+    content="""            <p>Bonjour <strong>$username</strong>,</p>
+            <p>Vous avez demandé la réinitialisation de votre mot de passe. Cliquez sur le bouton ci-dessous pour créer un nouveau mot de passe :</p>
+            <p style="text-align: center;">
+                <a href="$url" class="button">Réinitialiser mon mot de passe</a>
+            </p>
+            <p>Si le bouton ne fonctionne pas, copiez et collez ce lien dans votre navigateur :</p>
+            <p class="link">$url</p>
+            <div class="warning">
+                <strong>⚠️ Important :</strong> Ce lien est valide pendant 1 heure seulement. Si vous n'avez pas demandé cette réinitialisation, ignorez cet email.
+            </div>""",
+    text="""Bonjour $username,
+
+Vous avez demandé la réinitialisation de votre mot de passe. Ouvrez ce lien pour créer un nouveau mot de passe :
+
+$url
+
+Important : ce lien est valide pendant 1 heure seulement. Si vous n'avez pas demandé cette réinitialisation, ignorez cet email.
+"""
+)
+
+WELCOME = EmailTemplate(
+    subject="Bienvenue sur Calmness FI ! 🎉",
+    title="Bienvenue sur Calmness FI",
+    header="""            <h1>🎉 Bienvenue sur Calmness FI !</h1>
+            <p>Votre compte a été créé avec succès</p>""",
+    content="""            <p>Bonjour <strong>$username</strong>,</p>
+            <p>Félicitations ! Votre compte Calmness FI est maintenant actif. Vous pouvez commencer votre parcours vers la maîtrise du trading.</p>
+
+            <div class="feature">
+                <h3>🚀 Commencez votre formation</h3>
+                <p>Découvrez nos formations complètes pour maîtriser l'art du trading avec sérénité.</p>
+            </div>
+
+            <div class="feature">
+                <h3>👥 Rejoignez la communauté</h3>
+                <p>Connectez-vous avec d'autres traders passionnés et partagez vos expériences.</p>
+            </div>
+
+            <div class="feature">
+                <h3>📊 Accédez aux signaux</h3>
+                <p>Recevez des signaux de trading en temps réel avec nos analyses quotidiennes.</p>
+            </div>
+
+            <p style="text-align: center;">
+                <a href="$frontend_url/dashboard" class="button">Accéder à mon dashboard</a>
+            </p>
+
+            <p>Si vous avez des questions, n'hésitez pas à nous contacter. Notre équipe est là pour vous accompagner.</p>""",
+    text="""Bonjour $username,
+
+Félicitations ! Votre compte Calmness FI est maintenant actif. Vous pouvez commencer votre parcours vers la maîtrise du trading.
+
+- Commencez votre formation : découvrez nos formations complètes pour maîtriser l'art du trading avec sérénité.
+- Rejoignez la communauté : connectez-vous avec d'autres traders passionnés et partagez vos expériences.
+- Accédez aux signaux : recevez des signaux de trading en temps réel avec nos analyses quotidiennes.
+
+Votre dashboard : $frontend_url/dashboard
+
+Si vous avez des questions, n'hésitez pas à nous contacter. Notre équipe est là pour vous accompagner.
+"""
+)
+
+EXPIRY_REMINDER = EmailTemplate(
+    subject="Votre abonnement expire bientôt",
+    title="Votre abonnement expire bientôt",
+    header="""            <h1>⏳ Calmness FI</h1>
+            <h2>Votre abonnement expire bientôt</h2>""",
+    content="""            <p>Votre abonnement expirera dans 2 jours.</p>
+            <p style="text-align: center;">
+                <a href="$frontend_url/dashboard" class="button">Renouveler mon abonnement</a>
+            </p>""",
+    text="""Votre abonnement expirera dans 2 jours.
+
+Pour le renouveler : $frontend_url/dashboard
+"""
+)
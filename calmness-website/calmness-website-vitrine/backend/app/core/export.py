@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.content import COLLECTIONS, list_pages, load_page, load_collection, load_snapshot
+from app.core.serialization import dumps
+from app.database import AsyncSessionLocal
+
+# Page names come from the URL of POST /api/pages/{page}; only export the
+# ones that are safe as file names.
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+_EXPORTED_FILE = re.compile(r"^([A-Za-z0-9_-]+)\.json(?:\.gz)?$")
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write to a temp file in the same directory, then rename over `path`:
+    readers see either the old file or the new one, never a partial write."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _publish(path: Path, body: bytes) -> None:
+    # The .gz sibling lets a front server (nginx gzip_static) skip compression
+    _atomic_write(path.with_name(path.name + ".gz"), gzip.compress(body, compresslevel=9, mtime=0))
+    _atomic_write(path, body)
+
+
+async def export_content(directory: Optional[str] = None) -> Dict[str, int]:
+    """Render every public page and collection to JSON under `directory`:
+    pages/<page>.json, services.json, faq.json and snapshot.json, each with
+    a gzip copy. Returns the number of bytes written per file."""
+    root = Path(directory or settings.EXPORT_DIR)
+    (root / "pages").mkdir(parents=True, exist_ok=True)
+
+    rendered: Dict[Path, bytes] = {}
+    async with AsyncSessionLocal() as session:
+        pages = [p for p in await list_pages(session) if _SAFE_NAME.match(p)]
+        for page in pages:
+            payload, _, _ = await load_page(session, page)
+            rendered[root / "pages" / f"{page}.json"] = dumps(payload)
+        for table in COLLECTIONS:
+            payload, _, _ = await load_collection(session, table)
+            rendered[root / f"{table}.json"] = dumps(payload)
+        payload, _, _ = await load_snapshot(session)
+        rendered[root / "snapshot.json"] = dumps(payload)
+
+    # Rendering is done before touching the disk so a DB error never leaves
+    # a half-updated export behind.
+    for path, body in rendered.items():
+        _publish(path, body)
+
+    # Drop pages that no longer exist. Only exact <page>.json[.gz] names:
+    # the dot-prefixed temp files of a concurrent export are left alone.
+    exported = set(pages)
+    for stale in (root / "pages").iterdir():
+        match = _EXPORTED_FILE.match(stale.name)
+        if match and match.group(1) not in exported:
+            stale.unlink(missing_ok=True)
+
+    return {str(path.relative_to(root)): len(body) for path, body in rendered.items()}
+
+
+class ContentExporter:
+    """Runs `export_content` after writes. Requests arriving while an export is
+    running are folded into a single follow-up run."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+
+    def request(self) -> None:
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            try:
+                await export_content(self.directory)
+            except Exception as e:
+                print(f"Content export error: {e}")
+
+
+content_exporter = ContentExporter()
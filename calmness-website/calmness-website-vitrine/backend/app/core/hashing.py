@@ -0,0 +1,155 @@
+import asyncio
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.core.config import settings
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _set_rounds(rounds: int) -> None:
+    # Hashes below `rounds` are flagged by pwd_context.needs_update
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """Highest bcrypt cost whose hash time stays within `target_ms` on this
+    host. Each extra round doubles the work, so one timing at `min_rounds`
+    is enough to extrapolate."""
+    sample = pwd_context.handler("bcrypt").using(rounds=min_rounds)
+    elapsed = min(_timed(sample.hash, "calibration") for _ in range(3))
+    extra = math.floor(math.log2(max(target_ms / 1000 / elapsed, 1)))
+    return max(min_rounds, min(min_rounds + extra, max_rounds))
+
+
+def _timed(fn, *args) -> float:
+    started = monotonic()
+    fn(*args)
+    return monotonic() - started
+
+
+# Executed in the worker (thread or process); time.monotonic is system-wide
+# on Linux so the timestamps are comparable with the event loop's.
+def _hash(password: str) -> Tuple[str, float, float]:
+    started = monotonic()
+    return pwd_context.hash(password), started, monotonic()
+
+
+def _verify(plain_password: str, hashed_password: str) -> Tuple[bool, float, float]:
+    started = monotonic()
+    return pwd_context.verify(plain_password, hashed_password), started, monotonic()
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded pool.
+
+    At most `workers` hashes run at once and `max_queue` more may wait; past
+    that, callers get a 503 immediately instead of piling up behind a burst.
+    """
+
+    def __init__(self, workers: int, executor: str = "thread", max_queue: int = 32):
+        self.workers = workers
+        self.executor_kind = executor
+        self.max_queue = max_queue
+        self.rounds: Optional[int] = None  # None: passlib's default cost
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                # Worker processes hold their own pwd_context
+                initargs = (self.rounds,) if self.rounds else ()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_set_rounds if self.rounds else None,
+                    initargs=initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwd-hash")
+        return self._executor
+
+    async def _run(self, fn, *args) -> Any:
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service temporarily overloaded, please retry",
+                headers={"Retry-After": "1"}
+            )
+        self._pending += 1
+        submitted = monotonic()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), fn, *args
+            )
+        finally:
+            self._pending -= 1
+        self._record(started - submitted, finished - started)
+        return result
+
+    def _record(self, wait: float, duration: float) -> None:
+        self.completed += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.hash_seconds_total += duration
+        self.hash_seconds_max = max(self.hash_seconds_max, duration)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    async def calibrate(self, target_ms: float, min_rounds: int, max_rounds: int) -> int:
+        """Pick the bcrypt cost for this deployment from a latency budget.
+        Stored hashes below it are upgraded on the next successful login."""
+        loop = asyncio.get_running_loop()
+        rounds = await loop.run_in_executor(None, calibrate_rounds, target_ms, min_rounds, max_rounds)
+        self.rounds = rounds
+        _set_rounds(rounds)
+        if self.executor_kind == "process":
+            self.shutdown()
+        return rounds
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """True if the hash uses outdated parameters (parsing only, no hashing)."""
+        return pwd_context.needs_update(hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.completed or 1
+        return {
+            "executor": self.executor_kind,
+            "rounds": self.rounds or pwd_context.handler("bcrypt").default_rounds,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "hash_ms_avg": round(self.hash_seconds_total / done * 1000, 2),
+            "hash_ms_max": round(self.hash_seconds_max * 1000, 2),
+            "queue_wait_ms_avg": round(self.wait_seconds_total / done * 1000, 2),
+            "queue_wait_ms_max": round(self.wait_seconds_max * 1000, 2),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, NamedTuple, Optional, Any
+from fastapi import Request, Response
+
+
+class CachedContent(NamedTuple):
+    """A rendered content payload with its HTTP validators."""
+    payload: Any
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def make_etag(updated_at: Optional[datetime], count: int) -> str:
+    """Weak ETag derived from the newest `updated_at` and the row count, so a
+    delete changes it as well as an insert or an update."""
+    stamp = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    return f'W/"{count:x}-{stamp:x}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # TIMESTAMP columns come back naive; they hold UTC (timezone('utc', now())
+    # in SQL, datetime.utcnow() in Python), whatever the server time zone
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (which wins when present) then If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: W/"x" and "x" match
+        wanted = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
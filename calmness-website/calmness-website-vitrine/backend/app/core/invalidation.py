@@ -0,0 +1,73 @@
+import asyncio
+import json
+from typing import Optional
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.cache import TTLCache, content_cache
+
+
+class InvalidationBus:
+    """Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+    Each worker keeps one dedicated connection LISTENing on the channel and
+    evicts the keys carried by every notification. Writers publish through
+    `publish()` inside their transaction, so the NOTIFY is only delivered
+    once the write is committed.
+    """
+
+    def __init__(self, cache: TTLCache, channel: str):
+        self.cache = cache
+        self.channel = channel
+        self._task: Optional[asyncio.Task] = None
+        self._conn: Optional[asyncpg.Connection] = None
+
+    async def publish(self, db: AsyncSession, *keys: str) -> None:
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            # Keys may contain any character (page names come from the URL)
+            {"channel": self.channel, "payload": json.dumps(keys)}
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        self.cache.invalidate(*json.loads(payload))
+
+    async def _listen_forever(self) -> None:
+        delay = 1.0
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._conn = await asyncpg.connect(
+                    host=settings.DB_HOST,
+                    port=int(settings.DB_PORT),
+                    user=settings.DB_USER,
+                    password=settings.DB_PASSWORD,
+                    database=settings.DB_NAME,
+                )
+                self._conn.add_termination_listener(lambda conn: lost.set())
+                await self._conn.add_listener(self.channel, self._on_notify)
+                # Notifications sent while we were not listening are lost
+                self.cache.clear()
+                delay = 1.0
+                await lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation listener error: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+invalidation_bus = InvalidationBus(content_cache, settings.CACHE_INVALIDATION_CHANNEL)
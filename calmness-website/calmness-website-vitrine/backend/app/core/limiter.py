@@ -1,29 +1,474 @@
-from time import time
-from typing import Dict, Tuple
-from fastapi import HTTPException, status
+import asyncio
+import fcntl
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from time import monotonic, time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from app.core.config import settings
+from app.database import engine
 
 
-# Limiteur basique en mémoire (à remplacer par Redis en production)
-_BUCKETS: Dict[str, Tuple[int, float]] = {}
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # secondes avant le prochain jeton (0 si autorisé)
 
 
-def rate_limit(key: str, max_calls: int = 10, window_seconds: int = 60) -> None:
-    """Limitation de débit très simple (clé = user/ip/action).
-    - max_calls: nombre d'appels autorisés dans la fenêtre
-    - window_seconds: taille de la fenêtre en secondes
+def _consume(tokens: float, elapsed: float, max_calls: int, window_seconds: float) -> Tuple[float, RateLimitResult]:
+    """Recharge un seau de jetons après `elapsed` secondes et tente d'en prendre un."""
+    rate = max_calls / window_seconds
+    tokens = min(float(max_calls), tokens + elapsed * rate)
+    if tokens >= 1:
+        tokens -= 1
+        return tokens, RateLimitResult(True, max_calls, int(tokens), 0.0)
+    return tokens, RateLimitResult(False, max_calls, 0, (1 - tokens) / rate)
+
+
+class RateLimitBackend:
+    """Interface des backends : `check()` consomme un appel pour `key`."""
+
+    name = "base"
+
+    def __init__(self):
+        self.allowed = 0
+        self.rejected = 0
+
+    async def check(self, key: str, max_calls: int, window_seconds: float) -> RateLimitResult:
+        raise NotImplementedError
+
+    def _count(self, result: RateLimitResult) -> RateLimitResult:
+        if result.allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return result
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "allowed": self.allowed, "rejected": self.rejected}
+
+
+class TokenBucketLimiter(RateLimitBackend):
+    """Limiteur à seau de jetons, en mémoire et borné (backend "memory").
+
+    Chaque clé dispose de `max_calls` jetons, rechargés en continu au rythme
+    de `max_calls / window_seconds` : pas de rafale x2 aux bords de fenêtre
+    comme avec une fenêtre fixe. Une vérification est en O(1).
+
+    Les seaux sont rangés du moins au plus récemment utilisé. Un seau inactif
+    depuis `window_seconds` est plein, donc équivalent à une clé absente : il
+    est supprimé dès qu'il arrive en tête. Au-delà de `max_keys` clés, la
+    moins récemment utilisée est évincée.
+
+    Les compteurs sont propres au processus : avec N workers, chaque limite
+    est N fois plus large.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100000):
+        super().__init__()
+        self.max_keys = max_keys
+        # clé -> (jetons, dernier passage, window_seconds)
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+        # Les routes `def` tournent dans le threadpool de Starlette
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key: str, max_calls: int, window_seconds: float) -> RateLimitResult:
+        now = monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._buckets.pop(key, None)
+            if entry is None:
+                tokens, result = _consume(float(max_calls), 0.0, max_calls, window_seconds)
+            else:
+                tokens, result = _consume(entry[0], now - entry[1], max_calls, window_seconds)
+            self._buckets[key] = (tokens, now, window_seconds)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return self._count(result)
+
+    async def check(self, key: str, max_calls: int, window_seconds: float) -> RateLimitResult:
+        return self.hit(key, max_calls, window_seconds)
+
+    def _evict_idle(self, now: float) -> None:
+        # Amorti O(1) : chaque seau n'est retiré qu'une fois
+        while self._buckets:
+            key, (_, last, window) = next(iter(self._buckets.items()))
+            if now - last < window:
+                break
+            del self._buckets[key]
+            self.evictions += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+        }
+
+
+# Une case de la table partagée : empreinte de la clé, jetons, dernier passage, fenêtre
+_SLOT = struct.Struct("<Qddd")
+
+
+class SharedMemoryBackend(RateLimitBackend):
+    """Seaux de jetons dans un fichier mmap partagé par les workers d'un même
+    hôte (backend "shm").
+
+    La table a un nombre fixe de cases (mémoire bornée) adressées par
+    l'empreinte de la clé, avec `PROBES` cases candidates par clé. Quand
+    elles sont toutes prises, la case inactive ou la plus ancienne est
+    réutilisée. Chaque vérification prend un verrou `flock` exclusif sur le
+    fichier, plus un verrou de thread (flock ne sépare pas les threads d'un
+    même processus).
+
+    `time.monotonic` est commune à tout le système sous Linux, les horodatages
+    sont donc comparables d'un worker à l'autre.
     """
-    now = time()
-    calls, start = _BUCKETS.get(key, (0, now))
-    # Réinitialiser la fenêtre si expirée
-    if now - start > window_seconds:
-        calls, start = 0, now
-    calls += 1
-    _BUCKETS[key] = (calls, start)
-    if calls > max_calls:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                            detail="Trop de requêtes, veuillez réessayer plus tard.")
 
+    name = "shm"
+    PROBES = 8
+
+    def __init__(self, path: str, slots: int = 65536):
+        super().__init__()
+        self.path = path
+        self.slots = slots
+        size = slots * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @staticmethod
+    def _fingerprint(key: str) -> int:
+        # 0 marque une case vide
+        return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def hit(self, key: str, max_calls: int, window_seconds: float) -> RateLimitResult:
+        fingerprint = self._fingerprint(key)
+        now = monotonic()
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                target, found, victim_rank = None, None, None
+                for i in range(self.PROBES):
+                    index = (fingerprint + i) % self.slots
+                    slot = _SLOT.unpack_from(self._map, index * _SLOT.size)
+                    if slot[0] == fingerprint:
+                        target, found = index, slot
+                        break
+                    # Case libre ou inactive d'abord, sinon la plus anciennement utilisée
+                    free = slot[0] == 0 or now - slot[2] >= slot[3]
+                    rank = (not free, slot[2])
+                    if victim_rank is None or rank < victim_rank:
+                        target, victim_rank = index, rank
+
+                if found is not None:
+                    tokens, result = _consume(found[1], now - found[2], max_calls, window_seconds)
+                else:
+                    if victim_rank[0]:
+                        self.evictions += 1
+                    tokens, result = _consume(float(max_calls), 0.0, max_calls, window_seconds)
+                _SLOT.pack_into(self._map, target * _SLOT.size, fingerprint, tokens, now, window_seconds)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return self._count(result)
+
+    async def check(self, key: str, max_calls: int, window_seconds: float) -> RateLimitResult:
+        return self.hit(key, max_calls, window_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "path": self.path, "slots": self.slots, "evictions": self.evictions}
+
+
+_UPSERT_COUNTERS = text("""
+    INSERT INTO rate_limit_counters (key, window_start, count)
+    SELECT * FROM unnest(CAST(:keys AS text[]), CAST(:starts AS bigint[]), CAST(:counts AS integer[]))
+    ON CONFLICT (key, window_start) DO UPDATE SET count = rate_limit_counters.count + EXCLUDED.count
+    RETURNING key, window_start, count
+""")
+
+# Lecture seule des totaux des autres clés actives : pas de nouvelle version
+# de ligne ni de ligne à zéro, contrairement à un upsert "+0"
+_REFRESH_COUNTERS = text("""
+    SELECT key, window_start, count FROM rate_limit_counters
+    WHERE (key, window_start) IN (
+        SELECT * FROM unnest(CAST(:keys AS text[]), CAST(:starts AS bigint[]))
+    )
+""")
+
+_SELECT_COUNTERS = text("""
+    SELECT window_start, count FROM rate_limit_counters
+    WHERE key = :key AND window_start IN (:current, :previous)
+""")
+
+
+class PostgresBackend(RateLimitBackend):
+    """Compteurs partagés par tous les workers (et tous les hôtes) dans la
+    table `rate_limit_counters` (backend "postgres"), conservés au redémarrage.
+
+    Fenêtre glissante approchée : la fenêtre précédente compte au prorata du
+    temps restant. Les appels sont d'abord comptés localement puis envoyés
+    toutes les `sync_interval` secondes en un seul upsert atomique
+    (`count = count + n`) qui renvoie les totaux de tous les workers ; les
+    autres clés actives du worker sont relues par un simple SELECT, sans
+    écriture. Une clé inconnue du worker est lue
+    une fois par fenêtre. Entre deux synchronisations, chaque worker ne voit
+    que ses propres appels : la limite peut être dépassée d'au plus ce que
+    les autres workers ont accepté pendant cet intervalle.
+    """
+
+    name = "postgres"
+
+    def __init__(self, sync_interval: float = 0.5):
+        super().__init__()
+        self.sync_interval = sync_interval
+        # (clé, début de fenêtre) -> (total connu en base, taille de fenêtre)
+        self._known: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        # (clé, début de fenêtre) -> appels acceptés non encore envoyés
+        self._pending: Dict[Tuple[str, int], int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.syncs = 0
+
+    async def check(self, key: str, max_calls: int, window_seconds: float) -> RateLimitResult:
+        window = max(int(window_seconds), 1)
+        now = time()
+        start = int(now // window) * window
+        current, previous = (key, start), (key, start - window)
+        if current not in self._known:
+            await self._load(key, start, window)
+
+        weight = 1 - (now - start) / window
+        previous_count = self._known.get(previous, (0, window))[0]
+        current_count = self._known[current][0] + self._pending.get(current, 0)
+        used = previous_count * weight + current_count
+
+        if used + 1 <= max_calls:
+            self._pending[current] = self._pending.get(current, 0) + 1
+            return self._count(RateLimitResult(True, max_calls, int(max_calls - used - 1), 0.0))
+
+        if current_count + 1 > max_calls or previous_count == 0:
+            retry_after = start + window - now
+        else:
+            # Moment où la part de la fenêtre précédente laisse passer un appel
+            weight_needed = (max_calls - 1 - current_count) / previous_count
+            retry_after = start + window * (1 - weight_needed) - now
+        return self._count(RateLimitResult(False, max_calls, 0, max(retry_after, 0.0)))
+
+    async def _load(self, key: str, start: int, window: int) -> None:
+        async with engine.connect() as conn:
+            rows = (await conn.execute(
+                _SELECT_COUNTERS, {"key": key, "current": start, "previous": start - window}
+            )).all()
+        counts = {row.window_start: row.count for row in rows}
+        for window_start in (start, start - window):
+            entry = (key, window_start)
+            if entry not in self._known:
+                self._known[entry] = (counts.get(window_start, 0), window)
+
+    async def sync(self) -> int:
+        """Envoie les appels en attente et récupère les totaux partagés."""
+        pending, self._pending = self._pending, {}
+        now = time()
+        # Les fenêtres qui ne comptent plus (ni courante, ni précédente)
+        self._known = {k: v for k, v in self._known.items() if k[1] + 2 * v[1] > now}
+        # Les fenêtres courantes sans appel local sont seulement relues
+        others = [
+            k for k, (_, window) in self._known.items() if k not in pending and k[1] + window > now
+        ]
+        if not pending and not others:
+            return 0
+        rows = []
+        try:
+            async with engine.begin() as conn:
+                if pending:
+                    rows += (await conn.execute(_UPSERT_COUNTERS, {
+                        "keys": [k for k, _ in pending],
+                        "starts": [s for _, s in pending],
+                        "counts": list(pending.values()),
+                    })).all()
+                if others:
+                    rows += (await conn.execute(_REFRESH_COUNTERS, {
+                        "keys": [k for k, _ in others],
+                        "starts": [s for _, s in others],
+                    })).all()
+        except Exception:
+            for k, n in pending.items():
+                self._pending[k] = self._pending.get(k, 0) + n
+            raise
+        for row in rows:
+            entry = (row.key, row.window_start)
+            if entry in self._known:
+                self._known[entry] = (row.count, self._known[entry][1])
+        self.syncs += 1
+        return len(rows)
+
+    async def _sync_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Rate limit sync error: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await self.sync()
+        except Exception as e:
+            print(f"Rate limit sync error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "keys": len(self._known),
+            "pending": sum(self._pending.values()),
+            "syncs": self.syncs,
+            "sync_interval": self.sync_interval,
+        }
+
+
+def make_backend(name: str) -> RateLimitBackend:
+    if name == "shm":
+        return SharedMemoryBackend(settings.RATE_LIMIT_SHM_PATH, settings.RATE_LIMIT_SHM_SLOTS)
+    if name == "postgres":
+        return PostgresBackend(settings.RATE_LIMIT_SYNC_INTERVAL)
+    if name == "memory":
+        return TokenBucketLimiter(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    raise ValueError(f"Backend de limitation inconnu : {name}")
+
+
+limiter = make_backend(settings.RATE_LIMIT_BACKEND)
+
+
+class RateLimitPolicy(NamedTuple):
+    """Une ligne de la table des limites appliquées par RateLimitMiddleware."""
+    method: str
+    path: str  # gabarit de route, ex. "/api/billing/methods/{method_id}"
+    max_calls: int
+    window_seconds: int = 60
+    key: str = "ip"  # "ip", "user" (sujet du JWT, sinon IP) ou "route" (global)
+    name: Optional[str] = None  # préfixe des clés, "METHODE path" par défaut
+
+
+def _path_regex(template: str) -> "re.Pattern[str]":
+    parts = re.split(r"\{[^}/]+\}", template)
+    return re.compile("^" + "[^/]+".join(re.escape(part) for part in parts) + "$")
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI appliquant une table déclarative de limites.
+
+    La requête est rejetée (429 + `Retry-After`) avant toute lecture du corps,
+    création de session DB ou hachage bcrypt. Les réponses des routes
+    limitées portent `X-RateLimit-Limit` et `X-RateLimit-Remaining`.
+
+    `user_resolver(token)` renvoie l'identifiant de l'utilisateur d'un jeton
+    Bearer, ou None ; sans utilisateur, les politiques "user" retombent sur
+    l'adresse IP.
+    """
+
+    def __init__(self, app, policies: Iterable[RateLimitPolicy],
+                 user_resolver: Optional[Callable[[str], Optional[str]]] = None,
+                 backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.user_resolver = user_resolver
+        self.backend = backend
+        # Routes fixes en O(1), gabarits à paramètres ensuite
+        self._exact: Dict[Tuple[str, str], RateLimitPolicy] = {}
+        self._templated: List[Tuple[str, "re.Pattern[str]", RateLimitPolicy]] = []
+        for policy in policies:
+            method = policy.method.upper()
+            if "{" in policy.path:
+                self._templated.append((method, _path_regex(policy.path), policy))
+            else:
+                self._exact[(method, policy.path)] = policy
+
+    def _match(self, method: str, path: str) -> Optional[RateLimitPolicy]:
+        policy = self._exact.get((method, path))
+        if policy is None:
+            for policy_method, pattern, candidate in self._templated:
+                if policy_method == method and pattern.match(path):
+                    return candidate
+        return policy
+
+    def _key(self, policy: RateLimitPolicy, scope) -> str:
+        name = policy.name or f"{policy.method.upper()} {policy.path}"
+        if policy.key == "route":
+            return name
+        if policy.key == "user" and self.user_resolver is not None:
+            for header, value in scope["headers"]:
+                if header == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer" and token:
+                        user = self.user_resolver(token)
+                        if user is not None:
+                            return f"{name}:user:{user}"
+                    break
+        client = scope.get("client")
+        return f"{name}:ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        policy = self._match(scope["method"], scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
 
+        backend = self.backend or limiter
+        result = await backend.check(self._key(policy, scope), policy.max_calls, policy.window_seconds)
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+        }
+        if not result.allowed:
+            headers["Retry-After"] = str(max(math.ceil(result.retry_after), 1))
+            response = ORJSONResponse(
+                {"detail": "Trop de requêtes, veuillez réessayer plus tard."},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers=headers
+            )
+            await response(scope, receive, send)
+            return
 
+        raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
 
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + raw_headers}
+            await send(message)
 
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,295 @@
+import asyncio
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from time import monotonic
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
+from sqlalchemy import bindparam, event, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models.orm import EmailOutboxORM
+
+_outbox = EmailOutboxORM.__table__
+
+# Claims a batch: pushing next_attempt_at forward acts as a lease, so a worker
+# that dies mid-send leaves its rows to be retried once the lease runs out.
+CLAIM_QUERY = text("""
+    UPDATE email_outbox
+    SET attempts = attempts + 1, next_attempt_at = :lease_until
+    WHERE id IN (
+        SELECT id FROM email_outbox
+        WHERE status = 'pending' AND next_attempt_at <= :now
+        ORDER BY next_attempt_at
+        LIMIT :batch FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, recipient, subject, html_body, text_body, attempts
+""")
+
+
+class OutgoingEmail(NamedTuple):
+    recipient: str
+    subject: str
+    html_body: str
+    text_body: Optional[str] = None
+
+
+def _is_permanent(exc: Exception) -> bool:
+    """5xx answers will not get better by retrying."""
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return all(r.code >= 500 for r in exc.recipients)
+    return isinstance(exc, aiosmtplib.SMTPResponseException) and exc.code >= 500
+
+
+class _Connection:
+    """One SMTP client kept open between messages."""
+
+    def __init__(self, conf: ConnectionConfig):
+        self.conf = conf
+        self.client: Optional[aiosmtplib.SMTP] = None
+        self.last_used = 0.0
+
+    async def connect(self) -> aiosmtplib.SMTP:
+        if self.client is not None and self.client.is_connected:
+            return self.client
+        conf = self.conf
+        client = aiosmtplib.SMTP(
+            hostname=conf.MAIL_SERVER,
+            port=conf.MAIL_PORT,
+            use_tls=conf.MAIL_SSL_TLS,
+            start_tls=conf.MAIL_STARTTLS,
+            validate_certs=conf.VALIDATE_CERTS,
+            timeout=conf.TIMEOUT
+        )
+        await client.connect()
+        if conf.USE_CREDENTIALS:
+            await client.login(conf.MAIL_USERNAME, conf.MAIL_PASSWORD)
+        self.client = client
+        return client
+
+    async def send(self, message: EmailMessage) -> None:
+        client = await self.connect()
+        try:
+            await client.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # The server dropped an idle connection: reconnect once
+            self.client = None
+            client = await self.connect()
+            await client.send_message(message)
+        self.last_used = monotonic()
+
+    async def close(self) -> None:
+        client, self.client = self.client, None
+        if client is None or not client.is_connected:
+            return
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+
+class EmailOutbox:
+    """Persistent queue of outgoing emails.
+
+    `enqueue()` only inserts rows into `email_outbox`; a background worker
+    claims them in batches (`FOR UPDATE SKIP LOCKED`, so several workers can
+    drain the table) and sends them over at most `concurrency` SMTP
+    connections that stay open between batches. Failed sends are retried with
+    exponential backoff until `max_attempts`, then marked `failed`.
+    """
+
+    def __init__(
+        self, conf: ConnectionConfig, batch_size: int, concurrency: int, max_attempts: int,
+        retry_base: float, poll_interval: float, lease_seconds: float, idle_timeout: float
+    ):
+        self.conf = conf
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.idle_timeout = idle_timeout
+        self._connections = [_Connection(conf) for _ in range(concurrency)]
+        self._idle: Optional[asyncio.Queue] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _sender(self) -> str:
+        return formataddr((self.conf.MAIL_FROM_NAME or "", self.conf.MAIL_FROM))
+
+    def _build(self, row: Any) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self._sender()
+        message["To"] = row.recipient
+        message["Subject"] = row.subject
+        message["Message-ID"] = make_msgid()
+        if row.text_body:
+            message.set_content(row.text_body)
+            message.add_alternative(row.html_body, subtype="html")
+        else:
+            message.set_content(row.html_body, subtype="html")
+        return message
+
+    async def enqueue(self, emails: Iterable[OutgoingEmail], db: AsyncSession = None) -> int:
+        """Queue emails for sending.
+
+        With `db`, the rows join the caller's transaction and are sent only
+        if it commits; the local worker is woken once it does. Otherwise they
+        are committed in a session of their own.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {**email._asdict(), "status": "pending", "attempts": 0, "next_attempt_at": now, "created_at": now}
+            for email in emails
+        ]
+        if not rows:
+            return 0
+        self.enqueued += len(rows)
+        if db is not None:
+            await db.execute(_outbox.insert(), rows)
+            # Before the commit the rows are invisible to the worker; the
+            # listener stays pending across a rollback of the same session
+            if not db.info.get("outbox_wake"):
+                db.info["outbox_wake"] = True
+                event.listen(db.sync_session, "after_commit", self._after_commit, once=True)
+            return len(rows)
+        async with AsyncSessionLocal() as session:
+            await session.execute(_outbox.insert(), rows)
+            await session.commit()
+        self._notify()
+        return len(rows)
+
+    def _after_commit(self, session: Any) -> None:
+        session.info.pop("outbox_wake", None)
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _claim(self) -> List[Any]:
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(CLAIM_QUERY, {
+                "now": now,
+                "lease_until": now + timedelta(seconds=self.lease_seconds),
+                "batch": self.batch_size
+            })
+            rows = result.all()
+            await db.commit()
+        return rows
+
+    async def _send(self, row: Any) -> Tuple[Any, Optional[Exception]]:
+        connection = await self._idle.get()
+        try:
+            await connection.send(self._build(row))
+            return row, None
+        except Exception as e:
+            # Never reuse a connection in an unknown state
+            await connection.close()
+            return row, e
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def drain(self) -> int:
+        """Send one batch; returns the number of claimed rows."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+        results = await asyncio.gather(*(self._send(row) for row in rows))
+
+        now = datetime.utcnow()
+        sent = [{"b_id": row.id} for row, error in results if error is None]
+        failed = []
+        for row, error in results:
+            if error is None:
+                continue
+            give_up = row.attempts >= self.max_attempts or _is_permanent(error)
+            failed.append({
+                "b_id": row.id,
+                "b_status": "failed" if give_up else "pending",
+                "b_next": now + timedelta(seconds=self.retry_base * 2 ** (row.attempts - 1)),
+                "b_error": f"{type(error).__name__}: {error}"[:2000]
+            })
+            if give_up:
+                self.failed += 1
+            else:
+                self.retried += 1
+
+        async with AsyncSessionLocal() as db:
+            if sent:
+                await db.execute(
+                    update(_outbox)
+                    .where(_outbox.c.id == bindparam("b_id"))
+                    .values(status="sent", sent_at=now, last_error=None),
+                    sent
+                )
+            if failed:
+                await db.execute(
+                    update(_outbox)
+                    .where(_outbox.c.id == bindparam("b_id"))
+                    .values(
+                        status=bindparam("b_status"),
+                        next_attempt_at=bindparam("b_next"),
+                        last_error=bindparam("b_error")
+                    ),
+                    failed
+                )
+            await db.commit()
+        self.sent += len(sent)
+        return len(rows)
+
+    async def _close_idle(self) -> None:
+        horizon = monotonic() - self.idle_timeout
+        for connection in self._connections:
+            if connection.client is not None and connection.last_used < horizon:
+                await connection.close()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                # A full batch means more may be waiting: go again at once
+                if await self.drain() >= self.batch_size:
+                    continue
+            except Exception as e:
+                print(f"Email outbox error: {e}")
+            await self._close_idle()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        self._idle = asyncio.Queue()
+        for connection in self._connections:
+            self._idle.put_nowait(connection)
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the worker; rows claimed by an interrupted batch are retried
+        by the next worker once their lease expires."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for connection in self._connections:
+            await connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "open_connections": sum(c.client is not None for c in self._connections),
+        }
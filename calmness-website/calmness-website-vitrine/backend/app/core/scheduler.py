@@ -1,31 +1,47 @@
 import asyncio
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import or_, select, text, update
 from app.database import AsyncSessionLocal
+from app.core.config import settings
 from app.models.orm import SubscriptionORM
-from app.core.email import fastmail, MessageSchema
+from app.models.auth import User
+from app.core.email import email_outbox
+from app.core.email_templates import EXPIRY_REMINDER
+
+_subscriptions = SubscriptionORM.__table__
+_users = User.__table__
 
 
 async def send_expiry_reminders():
-    """Envoi des rappels J-2 aux abonnés qui expirent bientôt."""
+    """Envoi des rappels J-2 aux abonnés qui expirent bientôt.
+
+    `reminder_sent_at` est posé dans la même requête que la lecture des
+    destinataires : chaque période n'est rappelée qu'une fois, même si
+    plusieurs workers exécutent le job en même temps.
+    """
     async with AsyncSessionLocal() as db:  # type: AsyncSession
         now = datetime.utcnow()
         soon = now + timedelta(days=2)
-        res = await db.execute(select(SubscriptionORM).where(
-            SubscriptionORM.status == "active",
-            SubscriptionORM.current_period_end <= soon,
-            SubscriptionORM.current_period_end > now
-        ))
-        subs = res.scalars().all()
-        for _ in subs:
-            # TODO: récupérer email user via jointure; ici placeholder
-            email = "user@example.com"
-            msg = MessageSchema(subject="Votre abonnement expire bientôt",
-                                recipients=[email],
-                                body="Votre abonnement expirera dans 2 jours.",
-                                subtype="html")
-            await fastmail.send_message(msg)
+        res = await db.execute(
+            update(_subscriptions)
+            .where(
+                _subscriptions.c.user_id == _users.c.id,
+                _subscriptions.c.status == "active",
+                _subscriptions.c.current_period_end <= soon,
+                _subscriptions.c.current_period_end > now,
+                or_(
+                    _subscriptions.c.reminder_sent_at.is_(None),
+                    _subscriptions.c.reminder_sent_at < _subscriptions.c.current_period_end - timedelta(days=2)
+                )
+            )
+            .values(reminder_sent_at=now)
+            .returning(_users.c.email)
+        )
+        emails = res.scalars().all()
+        # Une seule insertion dans la file d'envoi, dans la transaction du job
+        await email_outbox.enqueue([EXPIRY_REMINDER.render(email) for email in emails], db)
+        await db.commit()
 
 
 async def expire_subscriptions():
@@ -53,3 +69,68 @@ async def scheduler_loop():
         await asyncio.sleep(60 * 15)  # toutes les 15 minutes
 
 
+
+
+# Nettoyage des tables d'authentification : les sessions révoquées ou expirées
+# et les codes 2FA utilisés ou expirés ne sont jamais supprimés par les routes.
+# Idem pour les compteurs du limiteur de débit.
+REAPER_QUERIES = {
+    "user_sessions": """
+        DELETE FROM user_sessions WHERE id IN (
+            SELECT id FROM user_sessions
+            WHERE is_active = false OR expires_at < now()
+            LIMIT :batch FOR UPDATE SKIP LOCKED
+        )
+    """,
+    "two_factor_codes": """
+        DELETE FROM two_factor_codes WHERE id IN (
+            SELECT id FROM two_factor_codes
+            WHERE is_used = true OR expires_at < now()
+            LIMIT :batch FOR UPDATE SKIP LOCKED
+        )
+    """,
+    # Fenêtres du limiteur (backend postgres) terminées depuis plus d'un jour
+    "rate_limit_counters": """
+        DELETE FROM rate_limit_counters WHERE ctid IN (
+            SELECT ctid FROM rate_limit_counters
+            WHERE window_start < extract(epoch FROM now()) - 86400
+            LIMIT :batch FOR UPDATE SKIP LOCKED
+        )
+    """,
+}
+
+
+async def reap_table(table: str, batch_size: int, max_batches: int, pause: float) -> int:
+    """Supprime les lignes mortes d'une table par lots bornés.
+
+    Chaque lot est une transaction courte ; `pause` secondes séparent deux lots
+    pour limiter la charge, et `max_batches` borne le travail d'un passage.
+    """
+    deleted = 0
+    for _ in range(max_batches):
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(text(REAPER_QUERIES[table]), {"batch": batch_size})
+            await db.commit()
+        deleted += res.rowcount
+        if res.rowcount < batch_size:
+            break
+        await asyncio.sleep(pause)
+    return deleted
+
+
+async def reaper_loop():
+    """Boucle de nettoyage des sessions et codes 2FA périmés"""
+    while True:
+        for table in REAPER_QUERIES:
+            try:
+                deleted = await reap_table(
+                    table,
+                    settings.REAPER_BATCH_SIZE,
+                    settings.REAPER_MAX_BATCHES,
+                    settings.REAPER_BATCH_PAUSE
+                )
+                if deleted:
+                    print(f"Reaper: {deleted} lignes supprimées de {table}")
+            except Exception as e:
+                print(f"Reaper error ({table}):", e)
+        await asyncio.sleep(settings.REAPER_INTERVAL)
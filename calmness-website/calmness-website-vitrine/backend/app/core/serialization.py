@@ -0,0 +1,21 @@
+from decimal import Decimal
+from typing import Any
+import orjson
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    # Types orjson does not encode natively (datetime, date, UUID and
+    # dataclasses are handled in Rust)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to compact UTF-8 JSON bytes, ready to be used as a response body."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
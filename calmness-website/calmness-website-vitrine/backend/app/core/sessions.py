@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Any, Dict, NamedTuple, Optional
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.invalidation import InvalidationBus
+from app.models.auth import User, UserSession
+
+_sessions = UserSession.__table__
+_users = User.__table__
+
+
+class SessionEntry(NamedTuple):
+    session_id: int
+    user_id: int
+    expires_at: datetime
+    cached_at: float
+
+
+# Bus keys: "<user_id>" revokes the user's sessions, "principal:<user_id>"
+# only drops the cached user
+PRINCIPAL_PREFIX = "principal:"
+
+
+class SessionStore:
+    """Active user sessions, indexed in memory by token.
+
+    `lookup()` answers from the index and only queries `user_sessions` on a
+    miss. Session activity and `users.last_login` are recorded in memory and
+    written by `flush()` as one batched UPDATE per table, instead of a commit
+    per request. Revoking a user's sessions updates the table, takes effect
+    locally at once and is broadcast to the other workers.
+
+    `principals` caches the column values of authenticated users (see
+    app/core/auth.py); its invalidations travel on the same bus.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, principal_maxsize: int, principal_ttl: float):
+        self.ttl = ttl
+        # sha256(token) -> SessionEntry
+        self._index = TTLCache(maxsize=maxsize, ttl=ttl)
+        # str(user_id) -> column values of the user
+        self.principals = TTLCache(maxsize=principal_maxsize, ttl=principal_ttl)
+        # user_id -> monotonic time of the last revocation; entries cached
+        # before it are ignored, so a revocation is O(1) whatever the index size
+        self._revoked: Dict[int, float] = {}
+        self._last_seen: Dict[int, datetime] = {}
+        self._last_login: Dict[int, datetime] = {}
+        self.bus = InvalidationBus(self, settings.SESSION_INVALIDATION_CHANNEL)
+        self.flushes = 0
+        self.flushed_rows = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _is_valid(self, entry: SessionEntry) -> bool:
+        revoked_at = self._revoked.get(entry.user_id)
+        if revoked_at is not None and entry.cached_at <= revoked_at:
+            return False
+        return entry.expires_at > datetime.utcnow()
+
+    async def create(
+        self, db: AsyncSession, user_id: int, lifetime: timedelta,
+        device_info: str = None, ip_address: str = None
+    ) -> str:
+        """Insert a new session and commit it. The login timestamp is
+        recorded for the next flush rather than written here."""
+        session_token = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        expires_at = now + lifetime
+
+        result = await db.execute(
+            _sessions.insert()
+            .values(
+                user_id=user_id,
+                session_token=session_token,
+                device_info=device_info,
+                ip_address=ip_address,
+                is_active=True,
+                expires_at=expires_at,
+                last_seen_at=now
+            )
+            .returning(_sessions.c.id)
+        )
+        session_id = result.scalar_one()
+        await db.commit()
+
+        self._index.set(self._key(session_token), SessionEntry(session_id, user_id, expires_at, monotonic()))
+        self._last_login[user_id] = now
+        return session_token
+
+    async def lookup(self, db: AsyncSession, session_token: str) -> Optional[SessionEntry]:
+        """Return the active session for a token and record the activity."""
+        key = self._key(session_token)
+        entry = self._index.get(key)
+        if entry is not None and not self._is_valid(entry):
+            self._index.invalidate(key)
+            return None
+
+        if entry is None:
+            result = await db.execute(
+                select(_sessions.c.id, _sessions.c.user_id, _sessions.c.expires_at)
+                .where(
+                    _sessions.c.session_token == session_token,
+                    _sessions.c.is_active == True,
+                    _sessions.c.expires_at > datetime.utcnow()
+                )
+            )
+            row = result.first()
+            if row is None:
+                return None
+            entry = SessionEntry(row.id, row.user_id, row.expires_at.replace(tzinfo=None), monotonic())
+            self._index.set(key, entry)
+
+        self._last_seen[entry.session_id] = datetime.utcnow()
+        return entry
+
+    async def revoke_user(self, db: AsyncSession, user_id: int) -> None:
+        """Deactivate every session of a user, on all workers."""
+        await db.execute(
+            update(_sessions)
+            .where(_sessions.c.user_id == user_id, _sessions.c.is_active == True)
+            .values(is_active=False)
+        )
+        await self.bus.publish(db, str(user_id))
+        await db.commit()
+        self.invalidate(str(user_id))
+
+    async def publish_user_change(self, db: AsyncSession, user_id: int) -> None:
+        """Drop the cached user on every worker once `db` commits."""
+        await self.bus.publish(db, f"{PRINCIPAL_PREFIX}{user_id}")
+
+    # InvalidationBus interface
+    def invalidate(self, *keys: str) -> None:
+        now = monotonic()
+        for key in keys:
+            if key.startswith(PRINCIPAL_PREFIX):
+                self.principals.invalidate(key[len(PRINCIPAL_PREFIX):])
+            else:
+                self._revoked[int(key)] = now
+                self.principals.invalidate(key)
+
+    def clear(self) -> None:
+        self._index.clear()
+        self.principals.clear()
+
+    async def flush(self) -> int:
+        """Write the pending activity and login timestamps in one transaction."""
+        # Revocations older than the index TTL no longer shadow any entry
+        horizon = monotonic() - self.ttl
+        self._revoked = {k: v for k, v in self._revoked.items() if v > horizon}
+
+        last_seen, self._last_seen = self._last_seen, {}
+        last_login, self._last_login = self._last_login, {}
+        if not last_seen and not last_login:
+            return 0
+        try:
+            async with AsyncSessionLocal() as db:
+                if last_seen:
+                    await db.execute(
+                        update(_sessions)
+                        .where(_sessions.c.id == bindparam("b_id"))
+                        .values(last_seen_at=bindparam("b_ts")),
+                        [{"b_id": k, "b_ts": v} for k, v in last_seen.items()]
+                    )
+                if last_login:
+                    await db.execute(
+                        update(_users)
+                        .where(_users.c.id == bindparam("b_id"))
+                        .values(last_login=bindparam("b_ts")),
+                        [{"b_id": k, "b_ts": v} for k, v in last_login.items()]
+                    )
+                await db.commit()
+        except Exception:
+            # Keep the timestamps for the next attempt unless newer ones arrived
+            for k, v in last_seen.items():
+                self._last_seen.setdefault(k, v)
+            for k, v in last_login.items():
+                self._last_login.setdefault(k, v)
+            raise
+
+        rows = len(last_seen) + len(last_login)
+        self.flushes += 1
+        self.flushed_rows += rows
+        return rows
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Session flush error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index": self._index.stats(),
+            "principals": self.principals.stats(),
+            "pending_last_seen": len(self._last_seen),
+            "pending_last_login": len(self._last_login),
+            "revoked_users": len(self._revoked),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+        }
+
+
+session_store = SessionStore(
+    settings.SESSION_CACHE_MAX_ENTRIES, settings.SESSION_CACHE_TTL,
+    settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL
+)
@@ -0,0 +1,111 @@
+import math
+import os
+from typing import Any, Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.limiter import RateLimitBackend, limiter
+
+
+class SMSDispatcher:
+    """Sends SMS through the Twilio REST API.
+
+    One `httpx.AsyncClient` is kept for the life of the app, so sends reuse
+    pooled keep-alive connections instead of a new session and TLS handshake
+    each, and never block the event loop. Each destination number may receive
+    at most `max_per_number` messages per `window` seconds, counted on the
+    configured rate-limit backend so the limit holds across workers.
+    `base_url` can point to a local fake endpoint, or `transport` replace the
+    network entirely (e.g. `httpx.MockTransport`) in tests.
+    """
+
+    def __init__(
+        self, account_sid: Optional[str], auth_token: Optional[str], from_number: Optional[str],
+        base_url: str, timeout: float, max_connections: int,
+        max_per_number: int, window: float, backend: RateLimitBackend,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_per_number = max_per_number
+        self.window = window
+        self.backend = backend
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.sent = 0
+        self.failed = 0
+        self.throttled = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=(self.account_sid, self.auth_token),
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def _throttle(self, phone_number: str) -> None:
+        result = await self.backend.check(f"sms:{phone_number}", self.max_per_number, self.window)
+        if not result.allowed:
+            self.throttled += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many SMS sent to this number, please retry later",
+                headers={"Retry-After": str(max(math.ceil(result.retry_after), 1))}
+            )
+
+    async def send(self, phone_number: str, body: str) -> str:
+        """Send one SMS and return its message SID; raises 429 while the
+        number is throttled."""
+        if not all([self.account_sid, self.auth_token, self.from_number]):
+            raise Exception("Twilio configuration missing")
+
+        phone_number = "".join(phone_number.split())
+        await self._throttle(phone_number)
+
+        try:
+            response = await self._get_client().post(
+                f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+                data={"To": phone_number, "From": self.from_number, "Body": body}
+            )
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.failed += 1
+            raise
+        self.sent += 1
+        return response.json()["sid"]
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "throttled": self.throttled,
+        }
+
+
+sms_dispatcher = SMSDispatcher(
+    account_sid=os.getenv("TWILIO_ACCOUNT_SID"),
+    auth_token=os.getenv("TWILIO_AUTH_TOKEN"),
+    from_number=os.getenv("TWILIO_PHONE_NUMBER"),
+    base_url=settings.SMS_API_BASE_URL,
+    timeout=settings.SMS_TIMEOUT,
+    max_connections=settings.SMS_MAX_CONNECTIONS,
+    max_per_number=settings.SMS_MAX_PER_NUMBER,
+    window=settings.SMS_THROTTLE_WINDOW,
+    backend=limiter
+)
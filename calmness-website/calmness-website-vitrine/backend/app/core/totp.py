@@ -0,0 +1,117 @@
+import hmac
+import math
+from time import monotonic, time
+from typing import Any, Dict, Optional
+import pyotp
+from fastapi import HTTPException, status
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class TOTPVerifier:
+    """In-memory TOTP verification for 2FA codes.
+
+    - `pyotp.TOTP` objects are cached per user and rebuilt when the secret
+      changes.
+    - A user past `max_attempts` failures within `attempt_window` seconds is
+      rejected with a 429 before any HMAC is computed.
+    - Accepted (user, timestep) pairs are remembered until the step leaves the
+      validity window, so a code cannot be replayed; if every step of the
+      window was already used the attempt is rejected without crypto.
+      This state lives in the worker's memory (see `_used`).
+    - Every step of the window is computed and compared in constant time,
+      whichever one matches.
+    """
+
+    def __init__(self, max_attempts: int, attempt_window: float, valid_window: int = 1,
+                 max_entries: int = 10000, interval: int = 30):
+        self.max_attempts = max_attempts
+        self.attempt_window = attempt_window
+        self.valid_window = valid_window
+        self.interval = interval
+        # user_id -> (secret, TOTP)
+        self._totps = TTLCache(maxsize=max_entries, ttl=attempt_window)
+        # user_id -> (failures, window end)
+        self._attempts = TTLCache(maxsize=max_entries, ttl=attempt_window)
+        # (user_id, timestep) of accepted codes. Replay protection is per
+        # worker: with N uvicorn workers, a code accepted on one can still be
+        # replayed once on each of the others within its validity window.
+        self._used = TTLCache(maxsize=max_entries, ttl=interval * (2 * valid_window + 2))
+        self.accepted = 0
+        self.failed = 0
+        self.replayed = 0
+        self.throttled = 0
+
+    def _totp(self, user_id: int, secret: str) -> pyotp.TOTP:
+        cached = self._totps.get(user_id)
+        if cached is not None and cached[0] == secret:
+            return cached[1]
+        totp = pyotp.TOTP(secret, interval=self.interval)
+        self._totps.set(user_id, (secret, totp))
+        return totp
+
+    def _check_attempts(self, user_id: int) -> None:
+        entry = self._attempts.get(user_id)
+        if entry is not None and entry[0] >= self.max_attempts:
+            self.throttled += 1
+            retry_after = max(math.ceil(entry[1] - monotonic()), 1)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many invalid 2FA codes, please retry later",
+                headers={"Retry-After": str(retry_after)}
+            )
+
+    def _fail(self, user_id: int) -> bool:
+        self.failed += 1
+        now = monotonic()
+        failures, until = self._attempts.get(user_id) or (0, now + self.attempt_window)
+        self._attempts.set(user_id, (failures + 1, until), ttl=max(until - now, 0.001))
+        return False
+
+    def verify(self, user_id: int, secret: str, code: str, for_time: Optional[float] = None) -> bool:
+        """Check `code` for `user_id`; raises 429 while the user is throttled."""
+        self._check_attempts(user_id)
+
+        if len(code) != 6 or not code.isdigit():
+            return self._fail(user_id)
+
+        current = int((time() if for_time is None else for_time) // self.interval)
+        steps = [current + offset for offset in range(-self.valid_window, self.valid_window + 1)]
+        fresh = [step for step in steps if not self._used.contains((user_id, step))]
+        if not fresh:
+            self.replayed += 1
+            return self._fail(user_id)
+
+        totp = self._totp(user_id, secret)
+        matched = None
+        for step in steps:
+            # No early exit: every step costs the same whether it matches or not
+            if hmac.compare_digest(totp.generate_otp(step), code):
+                matched = step
+
+        if matched is None:
+            return self._fail(user_id)
+        if self._used.contains((user_id, matched)):
+            self.replayed += 1
+            return self._fail(user_id)
+
+        self._used.set((user_id, matched), True)
+        self._attempts.invalidate(user_id)
+        self.accepted += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accepted": self.accepted,
+            "failed": self.failed,
+            "replayed": self.replayed,
+            "throttled": self.throttled,
+        }
+
+
+totp_verifier = TOTPVerifier(
+    max_attempts=settings.TOTP_MAX_ATTEMPTS,
+    attempt_window=settings.TOTP_ATTEMPT_WINDOW,
+    valid_window=settings.TOTP_VALID_WINDOW,
+    max_entries=settings.TOTP_CACHE_MAX_ENTRIES,
+)
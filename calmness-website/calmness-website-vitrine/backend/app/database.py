@@ -1,12 +1,21 @@
+import asyncio
+from typing import Any, Dict
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.core.config import settings
 
 # Create async engine
+# The QueuePool keeps DB_POOL_MIN_SIZE connections and opens up to
+# DB_POOL_MAX_SIZE under load; callers wait at most DB_POOL_TIMEOUT for one.
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,  # Set to False in production
-    future=True
+    echo=settings.DB_ECHO,
+    future=True,
+    pool_size=settings.DB_POOL_MIN_SIZE,
+    max_overflow=max(settings.DB_POOL_MAX_SIZE - settings.DB_POOL_MIN_SIZE, 0),
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
 )
 
 # Create async session factory
@@ -28,3 +37,26 @@ async def get_db() -> AsyncSession:
             yield session
         finally:
             await session.close()
+
+
+async def warm_pool() -> None:
+    """Open DB_POOL_MIN_SIZE connections up front so the first requests
+    only pay for a pool checkout."""
+    async def _checkout():
+        async with engine.connect():
+            pass
+
+    await asyncio.gather(*(_checkout() for _ in range(settings.DB_POOL_MIN_SIZE)))
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Snapshot of the connection pool counters."""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_size": settings.DB_POOL_MAX_SIZE,
+        "timeout": settings.DB_POOL_TIMEOUT,
+    }
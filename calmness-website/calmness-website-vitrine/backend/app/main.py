@@ -1,17 +1,36 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .routers import billing
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import os
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from typing import List, Optional
-import json
-from app.database import engine
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import engine, get_db, AsyncSessionLocal, warm_pool, pool_stats
+from app.core.config import settings
+from app.core.cache import content_cache, page_key, SERVICES_KEY, FAQ_KEY, SNAPSHOT_KEY
+from app.core.invalidation import invalidation_bus
+from app.core.serialization import dumps
+from app.core.export import content_exporter
+from app.core.hashing import password_hasher
+from app.core.sessions import session_store
+from app.core.totp import totp_verifier
+from app.core.limiter import limiter, RateLimitMiddleware, RateLimitPolicy
+from app.core.auth import verify_token
+from app.core.email import email_outbox
+from app.core.sms import sms_dispatcher
+from app.core.content import (
+    load_page, load_collection, load_snapshot,
+    PAGE_VERSION_SQL, SERVICES_VERSION_SQL, FAQ_VERSION_SQL, SNAPSHOT_VERSION_SQL
+)
+from app.core.http_cache import (
+    CachedContent, make_etag, validator_headers, is_not_modified, not_modified_response
+)
 from app.models.orm import Base as OrmBase
-from app.core.scheduler import scheduler_loop
+from app.core.scheduler import scheduler_loop, reaper_loop
 import asyncio
 
 # Load environment variables
@@ -20,9 +39,34 @@ load_dotenv()
 app = FastAPI(
     title="Calmness FI Backend",
     description="Backend API pour la gestion du contenu du site Calmness FI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Rate limits, enforced before body parsing, DB sessions or bcrypt.
+# Billing still identifies users with a mock `user_id`; "user" keys fall
+# back to the client IP until the routes use the JWT.
+RATE_LIMIT_POLICIES = [
+    RateLimitPolicy("POST", "/auth/login", max_calls=10, window_seconds=60, key="ip"),
+    RateLimitPolicy("POST", "/auth/register", max_calls=5, window_seconds=600, key="ip"),
+    RateLimitPolicy("POST", "/auth/2fa/sms/send", max_calls=3, window_seconds=300, key="user"),
+    RateLimitPolicy("POST", "/api/billing/methods", max_calls=5, window_seconds=60, key="user", name="pm_create"),
+    RateLimitPolicy("GET", "/api/billing/methods", max_calls=20, window_seconds=60, key="user", name="pm_list"),
+    RateLimitPolicy("DELETE", "/api/billing/methods/{method_id}", max_calls=10, window_seconds=60, key="user", name="pm_delete"),
+    RateLimitPolicy("POST", "/api/billing/payments/init", max_calls=10, window_seconds=60, key="user", name="pay_init"),
+    RateLimitPolicy("POST", "/api/billing/subscriptions", max_calls=10, window_seconds=60, key="user", name="sub_create"),
+]
+
+def token_subject(token: str) -> Optional[str]:
+    try:
+        return str(verify_token(token, "access")["sub"])
+    except (HTTPException, KeyError):
+        return None
+
+# Added before CORS so that 429 responses still carry the CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, policies=RATE_LIMIT_POLICIES, user_resolver=token_subject)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -38,20 +82,59 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 # Static files for admin
 app.mount("/admin", StaticFiles(directory="admin", html=True), name="admin")
 
-# Database connection
-def get_db_connection():
+# Static export of the public content (export_static.py)
+app.mount("/static-content", StaticFiles(directory=settings.EXPORT_DIR), name="static-content")
+
+# Database errors raised by the pooled session
+def db_error(e: Exception) -> HTTPException:
+    if isinstance(e, PoolTimeoutError):
+        return HTTPException(status_code=503, detail="Database pool exhausted")
+    return HTTPException(status_code=500, detail=str(e))
+
+# Local side of a committed content write (peers are reached by NOTIFY)
+def content_changed(*keys: str) -> None:
+    content_cache.invalidate(*keys, SNAPSHOT_KEY)
+    if settings.EXPORT_ON_WRITE:
+        content_exporter.request()
+
+# Cached, conditional read of a public content key; the body is cached
+# pre-serialized so a hit costs no encoding at all.
+# `version_sql` must return (updated_at, count) cheaply; it is only run on a
+# cache miss for a conditional request so a 304 never fetches the rows.
+# `load(session)` returns the payload with the rows' newest updated_at and
+# count. It runs on its own session: concurrent misses share one load
+# (single-flight) and stale entries are refreshed in the background.
+# `ttl` overrides CONTENT_CACHE_TTL for this key.
+async def serve_content(
+    request: Request, db: AsyncSession, key: str, version_sql: str, params: dict, load, ttl: Optional[float] = None
+):
+    if not content_cache.contains(key) and (
+        "if-none-match" in request.headers or "if-modified-since" in request.headers
+    ):
+        try:
+            version = (await db.execute(text(version_sql), params)).one()
+        except Exception as e:
+            raise db_error(e)
+        etag = make_etag(version.updated_at, version.count)
+        if is_not_modified(request, etag, version.updated_at):
+            return not_modified_response(etag, version.updated_at)
+    
+    async def build():
+        async with AsyncSessionLocal() as session:
+            payload, updated_at, count = await load(session)
+        return CachedContent(dumps(payload), make_etag(updated_at, count), updated_at)
+    
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            database=os.getenv("DB_NAME", "calmness_db"),
-            user=os.getenv("DB_USER", "postgres"),
-            password=os.getenv("DB_PASSWORD", "password"),
-            port=os.getenv("DB_PORT", "5432")
-        )
-        return conn
+        entry = await content_cache.get_or_load(key, build, ttl)
     except Exception as e:
-        print(f"Database connection error: {e}")
-        return None
+        raise db_error(e)
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return not_modified_response(entry.etag, entry.last_modified)
+    
+    return Response(
+        entry.payload, media_type="application/json",
+        headers=validator_headers(entry.etag, entry.last_modified)
+    )
 
 # Pydantic models
 class PageContent(BaseModel):
@@ -81,73 +164,106 @@ class FAQ(BaseModel):
     updated_at: Optional[str] = None
 
 # Database initialization
-def init_database():
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
+async def init_database():
     try:
-        cursor = conn.cursor()
-        
-        # Create pages_content table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS pages_content (
-                id SERIAL PRIMARY KEY,
-                page VARCHAR(50) NOT NULL,
-                section VARCHAR(100) NOT NULL,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create services table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS services (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                description TEXT NOT NULL,
-                icon VARCHAR(100) NOT NULL,
-                link VARCHAR(255) NOT NULL,
-                "order" INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create faq table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS faq (
-                id SERIAL PRIMARY KEY,
-                question TEXT NOT NULL,
-                answer TEXT NOT NULL,
-                "order" INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        async with engine.begin() as conn:
+            # Create pages_content table
+            await conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS pages_content (
+                    id SERIAL PRIMARY KEY,
+                    page VARCHAR(50) NOT NULL,
+                    section VARCHAR(100) NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT timezone('utc', now()),
+                    updated_at TIMESTAMP DEFAULT timezone('utc', now())
+                )
+            """))
+
+            # One row per (page, section). Existing duplicates are removed by
+            # migration 0004; until it runs the index cannot be built, which
+            # must not prevent the other tables from being created.
+            try:
+                async with conn.begin_nested():
+                    await conn.execute(text("""
+                        CREATE UNIQUE INDEX IF NOT EXISTS uq_pages_content_page_section
+                        ON pages_content (page, section)
+                    """))
+            except Exception as e:
+                print(f"pages_content unique index not created, run `alembic upgrade head`: {e}")
+
+            # Create services table
+            await conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS services (
+                    id SERIAL PRIMARY KEY,
+                    title VARCHAR(255) NOT NULL,
+                    description TEXT NOT NULL,
+                    icon VARCHAR(100) NOT NULL,
+                    link VARCHAR(255) NOT NULL,
+                    "order" INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT timezone('utc', now()),
+                    updated_at TIMESTAMP DEFAULT timezone('utc', now())
+                )
+            """))
+
+            # Create faq table
+            await conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS faq (
+                    id SERIAL PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    "order" INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT timezone('utc', now()),
+                    updated_at TIMESTAMP DEFAULT timezone('utc', now())
+                )
+            """))
         return True
     except Exception as e:
         print(f"Database initialization error: {e}")
         return False
 
-# Initialize database on startup
-init_database()
-
 # Create SQLAlchemy tables if not exist (SQLModel style bootstrap)
 @app.on_event("startup")
 async def on_startup():
+    await init_database()
     try:
         async with engine.begin() as conn:
             await conn.run_sync(OrmBase.metadata.create_all)
     except Exception as e:
         print(f"ORM metadata create_all error: {e}")
-    # Démarrer le scheduler en tâche de fond
+    if settings.PASSWORD_HASH_TARGET_MS:
+        rounds = await password_hasher.calibrate(
+            settings.PASSWORD_HASH_TARGET_MS,
+            settings.PASSWORD_HASH_MIN_ROUNDS,
+            settings.PASSWORD_HASH_MAX_ROUNDS
+        )
+        print(f"bcrypt cost calibrated to {rounds} rounds")
+    try:
+        await warm_pool()
+    except Exception as e:
+        print(f"Database pool warm-up error: {e}")
+    # Invalidation du cache entre workers (LISTEN/NOTIFY)
+    invalidation_bus.start()
+    session_store.bus.start()
+    limiter.start()
+    asyncio.create_task(session_store.run(settings.SESSION_FLUSH_INTERVAL))
+    email_outbox.start()
+    # Démarrer le scheduler et le nettoyage des sessions en tâche de fond
     asyncio.create_task(scheduler_loop())
+    asyncio.create_task(reaper_loop())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await invalidation_bus.stop()
+    await session_store.bus.stop()
+    await limiter.stop()
+    await email_outbox.stop()
+    await sms_dispatcher.close()
+    try:
+        await session_store.flush()
+    except Exception as e:
+        print(f"Session flush error: {e}")
+    password_hasher.shutdown()
+    await engine.dispose()
 
 # API Routes
 app.include_router(billing.router)
@@ -156,218 +272,169 @@ app.include_router(billing.router)
 async def root():
     return {"message": "Calmness FI Backend API"}
 
+@app.get("/api/stats")
+async def get_stats():
+    return {
+        "db_pool": pool_stats(),
+        "content_cache": content_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "sessions": session_store.stats(),
+        "totp": totp_verifier.stats(),
+        "rate_limiter": limiter.stats(),
+        "email_outbox": email_outbox.stats(),
+        "sms": sms_dispatcher.stats()
+    }
+
+@app.get("/api/snapshot")
+async def get_site_snapshot(request: Request, db: AsyncSession = Depends(get_db)):
+    """Every page's sections, the services and the FAQ in one payload"""
+    return await serve_content(
+        request, db, SNAPSHOT_KEY, SNAPSHOT_VERSION_SQL, {}, load_snapshot, settings.SNAPSHOT_CACHE_TTL
+    )
+
 @app.get("/api/pages/{page}")
-async def get_page_content(page: str):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute(
-            "SELECT * FROM pages_content WHERE page = %s ORDER BY section",
-            (page,)
-        )
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        # Convert to dict format
-        content = {}
-        for row in results:
-            content[row['section']] = row['content']
-        
-        return {"data": content}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_page_content(page: str, request: Request, db: AsyncSession = Depends(get_db)):
+    return await serve_content(
+        request, db, page_key(page), PAGE_VERSION_SQL, {"page": page},
+        lambda session: load_page(session, page)
+    )
 
 @app.post("/api/pages/{page}")
-async def update_page_content(page: str, content: dict):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+async def update_page_content(page: str, content: Dict[str, str], db: AsyncSession = Depends(get_db)):
+    # Sections are text: null, numbers or objects are rejected with 422
     try:
-        cursor = conn.cursor()
-        
-        for section, text in content.items():
-            # Check if section exists
-            cursor.execute(
-                "SELECT id FROM pages_content WHERE page = %s AND section = %s",
-                (page, section)
-            )
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing
-                cursor.execute(
-                    "UPDATE pages_content SET content = %s, updated_at = CURRENT_TIMESTAMP WHERE page = %s AND section = %s",
-                    (text, page, section)
-                )
-            else:
-                # Insert new
-                cursor.execute(
-                    "INSERT INTO pages_content (page, section, content) VALUES (%s, %s, %s)",
-                    (page, section, text)
-                )
+        # Single set-based upsert; rows whose content is unchanged are not
+        # touched (and keep their updated_at), so they are not returned.
+        result = await db.execute(
+            text("""
+                INSERT INTO pages_content (page, section, content)
+                SELECT :page, s.section, s.content
+                FROM unnest(CAST(:sections AS text[]), CAST(:contents AS text[])) AS s(section, content)
+                ON CONFLICT (page, section) DO UPDATE
+                SET content = EXCLUDED.content, updated_at = timezone('utc', now())
+                WHERE pages_content.content IS DISTINCT FROM EXCLUDED.content
+                RETURNING (xmax = 0) AS inserted
+            """),
+            {"page": page, "sections": list(content.keys()), "contents": list(content.values())}
+        )
+        changed = result.scalars().all()
+        inserted = sum(1 for flag in changed if flag)
+        updated = len(changed) - inserted
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        if changed:
+            await invalidation_bus.publish(db, page_key(page), SNAPSHOT_KEY)
+        await db.commit()
+        if changed:
+            content_changed(page_key(page))
         
-        return {"message": "Content updated successfully"}
+        return {
+            "message": "Content updated successfully",
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": len(content) - len(changed)
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise db_error(e)
 
 @app.get("/api/services")
-async def get_services():
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SELECT * FROM services ORDER BY \"order\"")
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return {"data": [dict(row) for row in results]}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_services(request: Request, db: AsyncSession = Depends(get_db)):
+    return await serve_content(
+        request, db, SERVICES_KEY, SERVICES_VERSION_SQL, {},
+        lambda session: load_collection(session, "services")
+    )
 
 @app.post("/api/services")
-async def create_service(service: Service):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+async def create_service(service: Service, db: AsyncSession = Depends(get_db)):
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO services (title, description, icon, link, \"order\") VALUES (%s, %s, %s, %s, %s) RETURNING id",
-            (service.title, service.description, service.icon, service.link, service.order)
+        result = await db.execute(
+            text("INSERT INTO services (title, description, icon, link, \"order\") VALUES (:title, :description, :icon, :link, :order) RETURNING id"),
+            {"title": service.title, "description": service.description, "icon": service.icon, "link": service.link, "order": service.order}
         )
-        service_id = cursor.fetchone()[0]
-        conn.commit()
-        cursor.close()
-        conn.close()
+        service_id = result.scalar_one()
+        await invalidation_bus.publish(db, SERVICES_KEY, SNAPSHOT_KEY)
+        await db.commit()
+        content_changed(SERVICES_KEY)
         
         return {"id": service_id, "message": "Service created successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise db_error(e)
 
 @app.put("/api/services/{service_id}")
-async def update_service(service_id: int, service: Service):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+async def update_service(service_id: int, service: Service, db: AsyncSession = Depends(get_db)):
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE services SET title = %s, description = %s, icon = %s, link = %s, \"order\" = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-            (service.title, service.description, service.icon, service.link, service.order, service_id)
+        await db.execute(
+            text("UPDATE services SET title = :title, description = :description, icon = :icon, link = :link, \"order\" = :order, updated_at = timezone('utc', now()) WHERE id = :id"),
+            {"title": service.title, "description": service.description, "icon": service.icon, "link": service.link, "order": service.order, "id": service_id}
         )
-        conn.commit()
-        cursor.close()
-        conn.close()
+        await invalidation_bus.publish(db, SERVICES_KEY, SNAPSHOT_KEY)
+        await db.commit()
+        content_changed(SERVICES_KEY)
         
         return {"message": "Service updated successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise db_error(e)
 
 @app.delete("/api/services/{service_id}")
-async def delete_service(service_id: int):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+async def delete_service(service_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM services WHERE id = %s", (service_id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
+        await db.execute(text("DELETE FROM services WHERE id = :id"), {"id": service_id})
+        await invalidation_bus.publish(db, SERVICES_KEY, SNAPSHOT_KEY)
+        await db.commit()
+        content_changed(SERVICES_KEY)
         
         return {"message": "Service deleted successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise db_error(e)
 
 @app.get("/api/faq")
-async def get_faq():
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("SELECT * FROM faq ORDER BY \"order\"")
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return {"data": [dict(row) for row in results]}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_faq(request: Request, db: AsyncSession = Depends(get_db)):
+    return await serve_content(
+        request, db, FAQ_KEY, FAQ_VERSION_SQL, {},
+        lambda session: load_collection(session, "faq")
+    )
 
 @app.post("/api/faq")
-async def create_faq(faq: FAQ):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+async def create_faq(faq: FAQ, db: AsyncSession = Depends(get_db)):
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO faq (question, answer, \"order\") VALUES (%s, %s, %s) RETURNING id",
-            (faq.question, faq.answer, faq.order)
+        result = await db.execute(
+            text("INSERT INTO faq (question, answer, \"order\") VALUES (:question, :answer, :order) RETURNING id"),
+            {"question": faq.question, "answer": faq.answer, "order": faq.order}
         )
-        faq_id = cursor.fetchone()[0]
-        conn.commit()
-        cursor.close()
-        conn.close()
+        faq_id = result.scalar_one()
+        await invalidation_bus.publish(db, FAQ_KEY, SNAPSHOT_KEY)
+        await db.commit()
+        content_changed(FAQ_KEY)
         
         return {"id": faq_id, "message": "FAQ created successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise db_error(e)
 
 @app.put("/api/faq/{faq_id}")
-async def update_faq(faq_id: int, faq: FAQ):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+async def update_faq(faq_id: int, faq: FAQ, db: AsyncSession = Depends(get_db)):
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE faq SET question = %s, answer = %s, \"order\" = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-            (faq.question, faq.answer, faq.order, faq_id)
+        await db.execute(
+            text("UPDATE faq SET question = :question, answer = :answer, \"order\" = :order, updated_at = timezone('utc', now()) WHERE id = :id"),
+            {"question": faq.question, "answer": faq.answer, "order": faq.order, "id": faq_id}
         )
-        conn.commit()
-        cursor.close()
-        conn.close()
+        await invalidation_bus.publish(db, FAQ_KEY, SNAPSHOT_KEY)
+        await db.commit()
+        content_changed(FAQ_KEY)
         
         return {"message": "FAQ updated successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise db_error(e)
 
 @app.delete("/api/faq/{faq_id}")
-async def delete_faq(faq_id: int):
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+async def delete_faq(faq_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM faq WHERE id = %s", (faq_id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
+        await db.execute(text("DELETE FROM faq WHERE id = :id"), {"id": faq_id})
+        await invalidation_bus.publish(db, FAQ_KEY, SNAPSHOT_KEY)
+        await db.commit()
+        content_changed(FAQ_KEY)
         
         return {"message": "FAQ deleted successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise db_error(e)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -49,6 +49,16 @@ class OAuthAccount(Base):
 
 class UserSession(Base):
     __tablename__ = "user_sessions"
+    __table_args__ = (
+        # Token lookup of active sessions, answered from the index alone
+        Index(
+            "ix_user_sessions_active_token", "session_token",
+            postgresql_include=["id", "user_id", "expires_at"],
+            postgresql_where=text("is_active")
+        ),
+        Index("ix_user_sessions_user_active", "user_id", postgresql_where=text("is_active")),
+        Index("ix_user_sessions_expires_at", "expires_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -57,6 +67,7 @@ class UserSession(Base):
     ip_address = Column(String(45), nullable=True)
     is_active = Column(Boolean, default=True)
     expires_at = Column(DateTime(timezone=True), nullable=False)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -65,6 +76,14 @@ class UserSession(Base):
 
 class TwoFactorCode(Base):
     __tablename__ = "two_factor_codes"
+    __table_args__ = (
+        # Pending codes by user and type (verification and deactivation)
+        Index(
+            "ix_two_factor_codes_pending", "user_id", "code_type", "code", "expires_at",
+            postgresql_where=text("NOT is_used")
+        ),
+        Index("ix_two_factor_codes_expires_at", "expires_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -95,7 +114,9 @@ class UserService(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
+    # services is a CMS table created with raw SQL by init_database, outside
+    # this metadata: no ForeignKey, so create_all does not need to resolve it
+    service_id = Column(Integer, nullable=False)
     status = Column(String(20), default="pending")  # pending, active, expired, cancelled
     payment_status = Column(String(20), default="pending")  # pending, paid, failed, refunded
     payment_id = Column(String(255), nullable=True)
@@ -107,5 +128,4 @@ class UserService(Base):
     
     # Relationships
     user = relationship("User", back_populates="user_services")
-    service = relationship("Service", back_populates="user_services")
 
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Boolean, Text, DateTime, Float, UniqueConstraint, Index
+from sqlalchemy import String, Integer, BigInteger, Boolean, Text, DateTime, Float, UniqueConstraint, Index, text
 from datetime import datetime, timedelta
 from app.database import Base
 
@@ -56,6 +56,8 @@ class SubscriptionORM(Base):
     auto_renew: Mapped[bool] = mapped_column(Boolean, default=True)
     telegram_chat_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
     telegram_joined_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Last J-2 reminder, so that each period is reminded only once
+    reminder_sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -84,3 +86,33 @@ class AuditLogORM(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+
+class RateLimitCounterORM(Base):
+    """Compteurs partagés du limiteur de débit (backend postgres)."""
+    __tablename__ = "rate_limit_counters"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    window_start: Mapped[int] = mapped_column(BigInteger, primary_key=True)  # epoch, en secondes
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class EmailOutboxORM(Base):
+    """File d'envoi des emails, vidée par app.core.outbox.EmailOutbox."""
+    __tablename__ = "email_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    recipient: Mapped[str] = mapped_column(String(255))
+    subject: Mapped[str] = mapped_column(String(255))
+    html_body: Mapped[str] = mapped_column(Text)
+    text_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default="pending")  # pending, sent, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    # Prochaine tentative ; repoussé pendant l'envoi pour servir de bail
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_pending", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
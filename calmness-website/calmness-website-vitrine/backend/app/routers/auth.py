@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Literal
 from app.database import get_db
 from app.models.auth import User, OAuthAccount, SocialLink, UserService
 from app.schemas.auth import (
@@ -11,11 +14,13 @@ from app.schemas.auth import (
     SocialLinkUpdate, SocialLinkResponse, UserDashboard
 )
 from app.core.auth import (
-    verify_password, get_password_hash, create_access_token, create_refresh_token,
+    verify_password, get_password_hash, password_needs_rehash, rehash_password,
+    create_access_token, create_refresh_token,
     verify_token, get_current_active_user, generate_2fa_secret, generate_2fa_qr_code,
     verify_2fa_code, generate_backup_codes, generate_sms_code, create_2fa_code,
     verify_2fa_code_db, create_user_session, verify_session_token, revoke_user_sessions,
-    create_email_verification_token, verify_email_verification_token
+    create_email_verification_token, verify_email_verification_token, invalidate_user_principal,
+    commit_user_change
 )
 from app.core.oauth import get_oauth_provider
 from app.core.email import send_email_verification, send_password_reset, send_2fa_sms_code, send_welcome_email
@@ -26,12 +31,13 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 # User Registration
 @router.post("/register", response_model=UserResponse)
-async def register_user(user_data: UserCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    ).limit(1))
+    existing_user = result.scalar_one_or_none()
     
     if existing_user:
         if existing_user.email == user_data.email:
@@ -46,7 +52,7 @@ async def register_user(user_data: UserCreate, background_tasks: BackgroundTasks
             )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     user = User(
         email=user_data.email,
         username=user_data.username,
@@ -57,23 +63,20 @@ async def register_user(user_data: UserCreate, background_tasks: BackgroundTasks
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()
     
-    # Send verification email
+    # Queue the verification email in the same transaction as the user
     verification_token = create_email_verification_token(user.id)
-    background_tasks.add_task(
-        send_email_verification,
-        user.email,
-        verification_token,
-        user.username
-    )
+    await send_email_verification(db, user.email, verification_token, user.username)
+    
+    await db.commit()
+    await db.refresh(user)
     
     return user
 
 # Email Verification
 @router.post("/verify-email")
-async def verify_email(token: str, db: Session = Depends(get_db)):
+async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
     """Verify user email"""
     user_id = verify_email_verification_token(token)
     if not user_id:
@@ -82,7 +85,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
             detail="Invalid or expired verification token"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,17 +93,18 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         )
     
     user.is_verified = True
-    db.commit()
+    await commit_user_change(db, user.id)
     
     return {"message": "Email verified successfully"}
 
 # User Login
 @router.post("/login", response_model=TokenResponse)
-async def login_user(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
+async def login_user(login_data: LoginRequest, request: Request, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
     """Login user with email and password"""
-    user = db.query(User).filter(User.email == login_data.email).first()
+    result = await db.execute(select(User).where(User.email == login_data.email))
+    user = result.scalar_one_or_none()
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not await verify_password(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -118,14 +122,16 @@ async def login_user(login_data: LoginRequest, request: Request, db: Session = D
             detail="Please verify your email before logging in"
         )
     
-    # Update last login
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # Upgrade the stored hash if the bcrypt cost was raised since
+    if password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(rehash_password, user.id, login_data.password, user.hashed_password)
     
-    # Create session
+    # Create session (last_login is written by the session store's next flush)
     device_info = request.headers.get("User-Agent", "Unknown")
     ip_address = request.client.host
-    session_token = create_user_session(db, user.id, device_info, ip_address)
+    session_token = await create_user_session(db, user.id, device_info, ip_address)
+    set_committed_value(user, "last_login", datetime.utcnow())
+    invalidate_user_principal(user.id)
     
     # Create tokens
     access_token = create_access_token({"sub": str(user.id)})
@@ -139,7 +145,7 @@ async def login_user(login_data: LoginRequest, request: Request, db: Session = D
 
 # OAuth Login
 @router.post("/oauth/login", response_model=TokenResponse)
-async def oauth_login(oauth_data: OAuthLoginRequest, request: Request, db: Session = Depends(get_db)):
+async def oauth_login(oauth_data: OAuthLoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
     """Login with OAuth provider"""
     provider = get_oauth_provider(oauth_data.provider)
     
@@ -157,16 +163,22 @@ async def oauth_login(oauth_data: OAuthLoginRequest, request: Request, db: Sessi
     user_info = await provider.get_user_info(access_token)
     
     # Check if OAuth account exists
-    oauth_account = db.query(OAuthAccount).filter(
-        OAuthAccount.provider == oauth_data.provider,
-        OAuthAccount.provider_user_id == user_info["id"]
-    ).first()
+    result = await db.execute(
+        select(OAuthAccount)
+        .options(selectinload(OAuthAccount.user))
+        .where(
+            OAuthAccount.provider == oauth_data.provider,
+            OAuthAccount.provider_user_id == str(user_info["id"])
+        )
+    )
+    oauth_account = result.scalar_one_or_none()
     
     if oauth_account:
         user = oauth_account.user
     else:
         # Check if user exists with same email
-        user = db.query(User).filter(User.email == user_info["email"]).first()
+        result = await db.execute(select(User).where(User.email == user_info["email"]))
+        user = result.scalar_one_or_none()
         
         if not user:
             # Create new user
@@ -174,7 +186,7 @@ async def oauth_login(oauth_data: OAuthLoginRequest, request: Request, db: Sessi
             # Ensure username is unique
             counter = 1
             original_username = username
-            while db.query(User).filter(User.username == username).first():
+            while await db.scalar(select(User.id).where(User.username == username)):
                 username = f"{original_username}{counter}"
                 counter += 1
             
@@ -186,21 +198,21 @@ async def oauth_login(oauth_data: OAuthLoginRequest, request: Request, db: Sessi
                 is_verified=True  # OAuth users are pre-verified
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         
         # Create OAuth account
         oauth_account = OAuthAccount(
             user_id=user.id,
             provider=oauth_data.provider,
-            provider_user_id=user_info["id"],
+            provider_user_id=str(user_info["id"]),
             provider_email=user_info["email"],
             access_token=access_token,
             refresh_token=token_data.get("refresh_token"),
             expires_at=datetime.utcnow() + timedelta(seconds=token_data.get("expires_in", 3600))
         )
         db.add(oauth_account)
-        db.commit()
+        await db.commit()
     
     if not user.is_active:
         raise HTTPException(
@@ -208,14 +220,12 @@ async def oauth_login(oauth_data: OAuthLoginRequest, request: Request, db: Sessi
             detail="Account is disabled"
         )
     
-    # Update last login
-    user.last_login = datetime.utcnow()
-    db.commit()
-    
-    # Create session
+    # Create session (last_login is written by the session store's next flush)
     device_info = request.headers.get("User-Agent", "Unknown")
     ip_address = request.client.host
-    session_token = create_user_session(db, user.id, device_info, ip_address)
+    session_token = await create_user_session(db, user.id, device_info, ip_address)
+    set_committed_value(user, "last_login", datetime.utcnow())
+    invalidate_user_principal(user.id)
     
     # Create tokens
     access_token = create_access_token({"sub": str(user.id)})
@@ -237,7 +247,11 @@ async def get_oauth_url(provider: str):
 
 # 2FA Setup
 @router.post("/2fa/setup", response_model=TwoFactorSetupResponse)
-async def setup_2fa(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def setup_2fa(
+    format: Literal["png", "svg"] = "png",
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
     """Setup 2FA for user"""
     if current_user.two_factor_enabled:
         raise HTTPException(
@@ -245,13 +259,16 @@ async def setup_2fa(current_user: User = Depends(get_current_active_user), db: S
             detail="2FA is already enabled"
         )
     
-    secret = generate_2fa_secret()
-    qr_code_url = generate_2fa_qr_code(secret, current_user.email)
-    backup_codes = generate_backup_codes()
+    # A retry of an unfinished setup keeps the pending secret (and its cached QR code)
+    secret = current_user.two_factor_secret
+    if not secret:
+        secret = generate_2fa_secret()
+        # Store secret in user record
+        current_user.two_factor_secret = secret
+        await commit_user_change(db, current_user.id)
     
-    # Store secret in user record
-    current_user.two_factor_secret = secret
-    db.commit()
+    qr_code_url = await generate_2fa_qr_code(secret, current_user.email, format)
+    backup_codes = generate_backup_codes()
     
     return TwoFactorSetupResponse(
         qr_code_url=qr_code_url,
@@ -264,7 +281,7 @@ async def setup_2fa(current_user: User = Depends(get_current_active_user), db: S
 async def verify_2fa_setup(
     verification_data: TwoFactorVerifyRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify 2FA setup and enable it"""
     if not current_user.two_factor_secret:
@@ -273,14 +290,14 @@ async def verify_2fa_setup(
             detail="2FA not set up"
         )
     
-    if not verify_2fa_code(current_user.two_factor_secret, verification_data.code):
+    if not verify_2fa_code(current_user.id, current_user.two_factor_secret, verification_data.code):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid 2FA code"
         )
     
     current_user.two_factor_enabled = True
-    db.commit()
+    await commit_user_change(db, current_user.id)
     
     return {"message": "2FA enabled successfully"}
 
@@ -289,30 +306,35 @@ async def verify_2fa_setup(
 async def send_2fa_sms(
     sms_data: TwoFactorSMSRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Send 2FA SMS code"""
     code = generate_sms_code()
-    create_2fa_code(db, current_user.id, code, "sms", sms_data.phone_number)
     
+    # Sent before it is stored: a throttled or failed send leaves the
+    # previous pending code valid
     try:
         await send_2fa_sms_code(sms_data.phone_number, code)
-        return {"message": "SMS code sent successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to send SMS"
         )
+    
+    await create_2fa_code(db, current_user.id, code, "sms", sms_data.phone_number)
+    return {"message": "SMS code sent successfully"}
 
 # 2FA SMS Verify
 @router.post("/2fa/sms/verify")
 async def verify_2fa_sms(
     verification_data: TwoFactorSMSVerifyRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify 2FA SMS code"""
-    if verify_2fa_code_db(db, current_user.id, verification_data.code, "sms"):
+    if await verify_2fa_code_db(db, current_user.id, verification_data.code, "sms"):
         return {"message": "SMS code verified successfully"}
     else:
         raise HTTPException(
@@ -324,11 +346,11 @@ async def verify_2fa_sms(
 @router.post("/password-reset")
 async def request_password_reset(
     reset_data: PasswordResetRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Request password reset"""
-    user = db.query(User).filter(User.email == reset_data.email).first()
+    result = await db.execute(select(User).where(User.email == reset_data.email))
+    user = result.scalar_one_or_none()
     
     if not user:
         # Don't reveal if email exists
@@ -338,12 +360,8 @@ async def request_password_reset(
     reset_token = create_email_verification_token(user.id)
     
     # Send reset email
-    background_tasks.add_task(
-        send_password_reset,
-        user.email,
-        reset_token,
-        user.username
-    )
+    await send_password_reset(db, user.email, reset_token, user.username)
+    await db.commit()
     
     return {"message": "If the email exists, a reset link has been sent"}
 
@@ -351,7 +369,7 @@ async def request_password_reset(
 @router.post("/password-reset/confirm")
 async def confirm_password_reset(
     reset_data: PasswordResetConfirm,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Confirm password reset"""
     user_id = verify_email_verification_token(reset_data.token)
@@ -361,7 +379,7 @@ async def confirm_password_reset(
             detail="Invalid or expired reset token"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -369,11 +387,11 @@ async def confirm_password_reset(
         )
     
     # Update password
-    user.hashed_password = get_password_hash(reset_data.new_password)
-    db.commit()
+    user.hashed_password = await get_password_hash(reset_data.new_password)
+    await db.commit()
     
     # Revoke all sessions
-    revoke_user_sessions(db, user.id)
+    await revoke_user_sessions(db, user.id)
     
     return {"message": "Password reset successfully"}
 
@@ -382,17 +400,17 @@ async def confirm_password_reset(
 async def change_password(
     password_data: ChangePasswordRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Change user password"""
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    db.commit()
+    current_user.hashed_password = await get_password_hash(password_data.new_password)
+    await commit_user_change(db, current_user.id)
     
     # Revoke all sessions except current one
     # (In a real implementation, you'd track the current session)
@@ -403,10 +421,10 @@ async def change_password(
 @router.post("/logout")
 async def logout_user(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Logout user"""
-    revoke_user_sessions(db, current_user.id)
+    await revoke_user_sessions(db, current_user.id)
     return {"message": "Logged out successfully"}
 
 # Get Current User
@@ -419,14 +437,16 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 @router.get("/dashboard", response_model=UserDashboard)
 async def get_user_dashboard(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user dashboard data"""
     # Get user services
-    user_services = db.query(UserService).filter(UserService.user_id == current_user.id).all()
+    result = await db.execute(select(UserService).where(UserService.user_id == current_user.id))
+    user_services = result.scalars().all()
     
     # Get social links
-    social_links = db.query(SocialLink).filter(SocialLink.is_active == True).order_by(SocialLink.order).all()
+    result = await db.execute(select(SocialLink).where(SocialLink.is_active == True).order_by(SocialLink.order))
+    social_links = result.scalars().all()
     
     # Calculate stats
     stats = {
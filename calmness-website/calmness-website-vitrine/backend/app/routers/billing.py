@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
 from typing import List
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
@@ -6,7 +7,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.core.crypto import encrypt_str, decrypt_str
 from app.models.orm import PaymentMethodORM, PaymentORM, SubscriptionORM, AdminConfigORM, AuditLogORM
-from app.core.limiter import rate_limit
 from ..schemas.billing import (
     PaymentMethodCreate, PaymentMethodOut,
     PaymentInit, PaymentOut,
@@ -14,7 +14,7 @@ from ..schemas.billing import (
     AdminConfigCreate, AdminConfigOut
 )
 
-router = APIRouter(prefix="/api/billing", tags=["billing"])
+router = APIRouter(prefix="/api/billing", tags=["billing"], default_response_class=ORJSONResponse)
 
 
 # Remarque: pour ce prototype, on mock l'auth et on passe user_id=1.
@@ -27,8 +27,6 @@ async def create_payment_method(
     db: AsyncSession = Depends(get_db),
     user_id: int = 1
 ):
-    # Limiter simple: 5 créations/minute par utilisateur
-    rate_limit(f"pm_create:{user_id}", max_calls=5, window_seconds=60)
     """Créer une méthode de paiement pour l'utilisateur (détails chiffrés)."""
     details_enc = encrypt_str(str(payload.details))
     obj = PaymentMethodORM(
@@ -56,7 +54,6 @@ async def list_payment_methods(
     db: AsyncSession = Depends(get_db),
     user_id: int = 1
 ):
-    rate_limit(f"pm_list:{user_id}", max_calls=20, window_seconds=60)
     """Lister les méthodes de paiement actives de l'utilisateur (sans divulguer les détails chiffrés)."""
     res = await db.execute(select(PaymentMethodORM).where(
         PaymentMethodORM.user_id == user_id,
@@ -75,7 +72,6 @@ async def delete_payment_method(
     db: AsyncSession = Depends(get_db),
     user_id: int = 1
 ):
-    rate_limit(f"pm_delete:{user_id}", max_calls=10, window_seconds=60)
     """Désactiver une méthode de paiement (soft delete)."""
     res = await db.execute(select(PaymentMethodORM).where(
         PaymentMethodORM.id == method_id,
@@ -96,7 +92,6 @@ async def init_payment(
     db: AsyncSession = Depends(get_db),
     user_id: int = 1
 ):
-    rate_limit(f"pay_init:{user_id}", max_calls=10, window_seconds=60)
     """Initialiser un paiement de manière idempotente (création en statut pending).
     - Utiliser `idempotency_key` pour éviter les doublons en cas de retry.
     - Journaliser l'action en audit log.
@@ -146,7 +141,6 @@ async def create_subscription(
     db: AsyncSession = Depends(get_db),
     user_id: int = 1
 ):
-    rate_limit(f"sub_create:{user_id}", max_calls=10, window_seconds=60)
     """Créer un abonnement (hebdo/mensuel). Telegram/Email seront gérés après confirmation paiement."""
     from datetime import datetime, timedelta
     now = datetime.utcnow()
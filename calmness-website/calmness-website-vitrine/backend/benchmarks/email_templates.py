@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark du rendu des emails (app/core/email_templates.py).
+
+Mesure le coût d'un rendu (partie HTML + partie texte) pour chaque gabarit,
+puis celui d'un envoi groupé de rappels d'expiration tel que le construit
+`send_expiry_reminders`.
+
+Usage : python benchmarks/email_templates.py [--number 20000] [--reminders 5000]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.email_templates import EMAIL_VERIFICATION, PASSWORD_RESET, WELCOME, EXPIRY_REMINDER
+
+URL = "http://localhost:3000/verify-email?token=" + "x" * 43
+
+CASES = [
+    ("vérification", lambda: EMAIL_VERIFICATION.render("alice@example.com", username="alice", url=URL)),
+    ("mot de passe", lambda: PASSWORD_RESET.render("alice@example.com", username="alice", url=URL)),
+    ("bienvenue", lambda: WELCOME.render("alice@example.com", username="alice")),
+    ("rappel d'expiration", lambda: EXPIRY_REMINDER.render("alice@example.com")),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--reminders", type=int, default=5000)
+    args = parser.parse_args()
+
+    for name, render in CASES:
+        seconds = timeit.timeit(render, number=args.number)
+        print(f"{name:<22} {seconds / args.number * 1e6:8.2f} µs/email")
+
+    recipients = [f"user{i}@example.com" for i in range(args.reminders)]
+    seconds = timeit.timeit(lambda: [EXPIRY_REMINDER.render(r) for r in recipients], number=10) / 10
+    print(f"\n{args.reminders} rappels        {seconds * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark du coût d'une vérification de limite de débit par backend.
+
+  - memory   : seaux de jetons dans le processus (TokenBucketLimiter)
+  - shm      : table mmap partagée entre workers, verrou flock
+  - postgres : compteurs locaux synchronisés par lots (nécessite la base du `.env`,
+               table `rate_limit_counters` : `alembic upgrade head`)
+
+Chaque backend est mesuré sur `--keys` clés distinctes (clé chaude répétée et
+clés réparties), en coroutines séquentielles ; `--workers` processus en
+parallèle mesurent la contention du backend shm.
+
+Usage : python benchmarks/rate_limit.py [--checks 100000] [--keys 1000] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+from app.core.limiter import PostgresBackend, SharedMemoryBackend, TokenBucketLimiter
+from app.database import engine
+
+LIMIT = 10 ** 9  # jamais atteinte : on mesure le chemin "autorisé"
+
+
+async def run(backend, checks, keys):
+    start = perf_counter()
+    for i in range(checks):
+        await backend.check(f"bench:{i % keys}", LIMIT, 60)
+    return (perf_counter() - start) / checks * 1e6
+
+
+def shm_worker(path, checks, keys, queue):
+    backend = SharedMemoryBackend(path, slots=65536)
+    queue.put(asyncio.run(run(backend, checks, keys)))
+
+
+async def bench_postgres(checks, keys):
+    backend = PostgresBackend(sync_interval=0.5)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM rate_limit_counters WHERE key LIKE 'bench:%'"))
+    except Exception as e:
+        return None, f"indisponible ({e.__class__.__name__})"
+    backend.start()
+    try:
+        per_check = await run(backend, checks, keys)
+        start = perf_counter()
+        rows = await backend.sync()
+        sync_ms = (perf_counter() - start) * 1000
+    finally:
+        await backend.stop()
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM rate_limit_counters WHERE key LIKE 'bench:%'"))
+        await engine.dispose()
+    return per_check, f"{backend.syncs} synchronisations, dernière : {rows} lignes en {sync_ms:.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=100000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.checks} vérifications, {args.keys} clés\n")
+
+    for keys in (1, args.keys):
+        us = asyncio.run(run(TokenBucketLimiter(), args.checks, keys))
+        print(f"memory    {keys:>6} clé(s)  {us:7.2f} µs/vérification")
+
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as tmp:
+        path = os.path.join(tmp, "ratelimit")
+        for keys in (1, args.keys):
+            us = asyncio.run(run(SharedMemoryBackend(path), args.checks, keys))
+            print(f"shm       {keys:>6} clé(s)  {us:7.2f} µs/vérification")
+
+        queue = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=shm_worker, args=(path, args.checks, args.keys, queue))
+            for _ in range(args.workers)
+        ]
+        for p in procs:
+            p.start()
+        results = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+        print(f"shm       {args.keys:>6} clé(s)  {sum(results) / len(results):7.2f} µs/vérification"
+              f"  ({args.workers} processus concurrents)")
+
+    us, detail = asyncio.run(bench_postgres(args.checks, args.keys))
+    if us is None:
+        print(f"postgres  {detail}")
+    else:
+        print(f"postgres  {args.keys:>6} clé(s)  {us:7.2f} µs/vérification  ({detail})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark du coût de sérialisation par requête sur les routes de lecture.
+
+Compare, pour une collection de lignes semblables à `services` / `faq` :
+  - avant  : copie des lignes + jsonable_encoder + json.dumps (chemin FastAPI par défaut)
+  - orjson : app.core.serialization.dumps sur les lignes brutes
+  - cache  : corps déjà encodé (coût d'un hit du cache de contenu)
+  - billing: modèles Pydantic sérialisés comme pour un `response_model`
+             (TypeAdapter.dump_python(mode="json")), rendus par JSONResponse
+             puis par ORJSONResponse
+
+Usage : python benchmarks/serialization.py [--rows 50] [--number 2000]
+"""
+
+import argparse
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.core.serialization import dumps
+from app.schemas.billing import PaymentMethodOut
+
+
+def make_rows(n):
+    now = datetime.utcnow()
+    return [
+        {
+            "id": i,
+            "title": f"Service {i}",
+            "description": "Recevez des signaux de trading en temps réel avec nos analyses quotidiennes. " * 3,
+            "icon": "fa-solid fa-chart-line",
+            "link": f"/services/{i}",
+            "order": i,
+            "created_at": now - timedelta(days=i),
+            "updated_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def report(name, seconds, number, baseline=None):
+    per_call = seconds / number * 1e6
+    ratio = f"  x{baseline / seconds:.1f}" if baseline else ""
+    print(f"{name:<28} {per_call:9.2f} µs/requête{ratio}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    cached = dumps({"data": rows})
+    methods = [
+        PaymentMethodOut(id=r["id"], provider="card", label=r["title"], is_active=True,
+                         created_at=r["created_at"], updated_at=r["updated_at"])
+        for r in rows
+    ]
+
+    print(f"{args.rows} lignes, {args.number} itérations\n")
+
+    before = timeit.timeit(
+        lambda: JSONResponse(jsonable_encoder({"data": [dict(r) for r in rows]})).body,
+        number=args.number,
+    )
+    report("avant (jsonable_encoder)", before, args.number)
+    report("orjson", timeit.timeit(lambda: dumps({"data": rows}), number=args.number), args.number, before)
+    report("cache (octets encodés)", timeit.timeit(lambda: bytes(cached), number=args.number), args.number, before)
+
+    print()
+    # Chemin de FastAPI pour un response_model : field.serialize(mode="json")
+    # puis rendu par la classe de réponse ; seul le rendu change entre les deux
+    adapter = TypeAdapter(List[PaymentMethodOut])
+    billing_before = timeit.timeit(
+        lambda: JSONResponse(adapter.dump_python(methods, mode="json")).body, number=args.number
+    )
+    report("billing JSONResponse", billing_before, args.number)
+    report(
+        "billing ORJSONResponse",
+        timeit.timeit(lambda: ORJSONResponse(adapter.dump_python(methods, mode="json")).body, number=args.number),
+        args.number,
+        billing_before,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Export statique du contenu public (pages, services, FAQ) en fichiers JSON
+
+Les fichiers sont écrits sous EXPORT_DIR (servi sur /static-content), avec une
+copie .gz, et publiés par renommage atomique.
+
+Usage : python export_static.py [--output ./public_content]
+"""
+
+import argparse
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+async def run(output):
+    from app.core.export import export_content
+    from app.database import engine
+
+    try:
+        written = await export_content(output)
+    finally:
+        await engine.dispose()
+    for name, size in sorted(written.items()):
+        print(f"  {name} ({size} octets)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporter le contenu public en JSON statique")
+    parser.add_argument("--output", help="Répertoire de sortie (par défaut : EXPORT_DIR)")
+    args = parser.parse_args()
+
+    print("🚀 Export du contenu public...")
+    try:
+        written = asyncio.run(run(args.output))
+    except Exception as e:
+        print(f"❌ Erreur lors de l'export : {e}")
+        raise SystemExit(1)
+    print(f"✅ {len(written)} fichiers publiés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings requires the DB_* variables; unit tests never connect
+for name, value in {
+    "DB_HOST": "localhost",
+    "DB_NAME": "calmness_test",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_PORT": "5432",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    """Postgres for the tests that need one, at `alembic upgrade head`.
+
+    Taken from DATABASE_URL (e.g. postgresql://postgres:pw@localhost/calmness_db);
+    those tests are skipped when it is unset or the server does not answer.
+    Each test works inside a transaction it rolls back, or in a schema of its own.
+    """
+    from sqlalchemy import text
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    url = make_url(os.environ["DATABASE_URL"]).set(drivername="postgresql+asyncpg")
+
+    async def ping():
+        engine = create_async_engine(url, poolclass=NullPool)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        finally:
+            await engine.dispose()
+
+    try:
+        asyncio.run(ping())
+    except Exception as e:
+        pytest.skip(f"Postgres unavailable: {e}")
+    return url
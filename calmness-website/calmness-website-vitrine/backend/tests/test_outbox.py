@@ -0,0 +1,250 @@
+"""EmailOutbox against a stub SMTP client.
+
+The claim / retry tests need Postgres (see the `database_url` fixture): they
+run on an email_outbox table created in a schema of their own, so rows
+queued by a running app are never claimed.
+"""
+import asyncio
+import os
+from email import message_from_bytes, policy
+from datetime import datetime, timedelta
+import aiosmtplib
+import pytest
+from fastapi_mail import ConnectionConfig
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.core import outbox as outbox_module
+from app.core.email_templates import EMAIL_VERIFICATION, WELCOME
+from app.core.outbox import EmailOutbox
+
+CONF = ConnectionConfig(
+    MAIL_USERNAME="user",
+    MAIL_PASSWORD="password",
+    MAIL_FROM="noreply@calmnessfi.com",
+    MAIL_FROM_NAME="Calmness FI",
+    MAIL_PORT=8025,
+    MAIL_SERVER="127.0.0.1",
+    MAIL_STARTTLS=False,
+    MAIL_SSL_TLS=False,
+    USE_CREDENTIALS=False,
+)
+
+
+class StubSMTP:
+    """Stands in for aiosmtplib.SMTP: records messages, or raises the next
+    queued error instead of sending."""
+
+    sent = []
+    errors = []
+
+    def __init__(self, **kwargs):
+        self.is_connected = False
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, username, password):
+        pass
+
+    async def send_message(self, message):
+        if StubSMTP.errors:
+            raise StubSMTP.errors.pop(0)
+        StubSMTP.sent.append(message)
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture(autouse=True)
+def stub_smtp(monkeypatch):
+    StubSMTP.sent = []
+    StubSMTP.errors = []
+    monkeypatch.setattr(aiosmtplib, "SMTP", StubSMTP)
+    return StubSMTP
+
+
+def make_outbox(**kwargs) -> EmailOutbox:
+    options = {
+        "batch_size": 10, "concurrency": 2, "max_attempts": 2, "retry_base": 10.0,
+        "poll_interval": 60.0, "lease_seconds": 300.0, "idle_timeout": 60.0,
+    }
+    options.update(kwargs)
+    return EmailOutbox(CONF, **options)
+
+
+def open_connections(outbox: EmailOutbox) -> None:
+    # What start() does, without launching the background worker
+    outbox._idle = asyncio.Queue()
+    for connection in outbox._connections:
+        outbox._idle.put_nowait(connection)
+
+
+def test_template_renders_to_multipart_message():
+    outbox = make_outbox()
+    row = EMAIL_VERIFICATION.render("jane@example.com", username="<Jane>", url="https://x.test/verify?a=1&b=2")
+
+    message = message_from_bytes(outbox._build(row).as_bytes(), policy=policy.default)
+
+    assert message["To"] == "jane@example.com"
+    assert message["From"] == "Calmness FI <noreply@calmnessfi.com>"
+    assert message["Subject"] == EMAIL_VERIFICATION.subject
+    assert message["Message-ID"]
+    assert message.get_content_type() == "multipart/alternative"
+    plain, html = message.iter_parts()
+    assert plain.get_content_type() == "text/plain"
+    assert html.get_content_type() == "text/html"
+    plain_text = plain.get_content()
+    html_text = html.get_content()
+    # Fields are escaped in the HTML part only
+    assert "Bonjour <Jane>," in plain_text
+    assert "https://x.test/verify?a=1&b=2" in plain_text
+    assert "&lt;Jane&gt;" in html_text
+    assert "https://x.test/verify?a=1&amp;b=2" in html_text
+
+
+@pytest.fixture
+def outbox_sessions(database_url, monkeypatch):
+    """Session factory on a private email_outbox, patched into the outbox module."""
+    schema = f"test_outbox_{os.getpid()}"
+    engine = create_async_engine(
+        database_url, poolclass=NullPool, connect_args={"server_settings": {"search_path": schema}}
+    )
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {schema}"))
+            await conn.run_sync(outbox_module._outbox.create)
+
+    async def teardown():
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await engine.dispose()
+
+    asyncio.run(setup())
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(outbox_module, "AsyncSessionLocal", sessions)
+    yield sessions
+    asyncio.run(teardown())
+
+
+async def fetch_rows(sessions):
+    async with sessions() as db:
+        result = await db.execute(text(
+            "SELECT id, recipient, status, attempts, next_attempt_at, sent_at, last_error FROM email_outbox ORDER BY id"
+        ))
+        return result.all()
+
+
+def test_drain_sends_queued_rows_once(outbox_sessions):
+    outbox = make_outbox()
+
+    async def scenario():
+        open_connections(outbox)
+        await outbox.enqueue([WELCOME.render(f"user{i}@example.com", username=f"user{i}") for i in range(3)])
+        first = await outbox.drain()
+        second = await outbox.drain()
+        await outbox.stop()
+        return first, second, await fetch_rows(outbox_sessions)
+
+    first, second, rows = asyncio.run(scenario())
+
+    assert (first, second) == (3, 0)
+    assert sorted(m["To"] for m in StubSMTP.sent) == [f"user{i}@example.com" for i in range(3)]
+    assert all(row.status == "sent" and row.sent_at is not None and row.attempts == 1 for row in rows)
+    assert outbox.stats()["sent"] == 3
+
+
+def test_enqueue_in_caller_transaction_is_dropped_on_rollback(outbox_sessions):
+    outbox = make_outbox()
+
+    async def scenario():
+        async with outbox_sessions() as db:
+            await outbox.enqueue([WELCOME.render("a@example.com", username="a")], db)
+            await db.rollback()
+        return await fetch_rows(outbox_sessions)
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_claim_skips_rows_locked_by_another_worker(outbox_sessions):
+    outbox = make_outbox(lease_seconds=120.0)
+
+    async def scenario():
+        await outbox.enqueue([WELCOME.render(f"user{i}@example.com", username="u") for i in range(3)])
+        async with outbox_sessions() as other:
+            # Another worker in the middle of claiming the oldest row
+            locked = (await other.execute(text(
+                "SELECT id FROM email_outbox ORDER BY id LIMIT 1 FOR UPDATE"
+            ))).scalar_one()
+            claimed = await outbox._claim()
+            await other.rollback()
+        return locked, claimed
+
+    before = datetime.utcnow()
+    locked, claimed = asyncio.run(scenario())
+
+    assert len(claimed) == 2
+    assert locked not in {row.id for row in claimed}
+    assert all(row.attempts == 1 for row in claimed)
+    # The claim leases the rows: none is due again before the lease runs out
+    rows = {row.id: row for row in asyncio.run(fetch_rows(outbox_sessions))}
+    for row in claimed:
+        assert rows[row.id].next_attempt_at >= before + timedelta(seconds=119)
+
+
+def test_transient_failure_is_retried_with_backoff_then_failed(outbox_sessions):
+    outbox = make_outbox(max_attempts=2, retry_base=10.0)
+    StubSMTP.errors = [aiosmtplib.SMTPResponseException(451, "try again later")] * 2
+
+    async def due_now():
+        async with outbox_sessions() as db:
+            await db.execute(text("UPDATE email_outbox SET next_attempt_at = now() AT TIME ZONE 'utc' - interval '1 second'"))
+            await db.commit()
+
+    async def scenario():
+        open_connections(outbox)
+        await outbox.enqueue([WELCOME.render("a@example.com", username="a")])
+        before = datetime.utcnow()
+        await outbox.drain()
+        after_first = (await fetch_rows(outbox_sessions))[0]
+        # Not due yet: the backoff keeps it out of the next batch
+        skipped = await outbox.drain()
+        await due_now()
+        await outbox.drain()
+        after_second = (await fetch_rows(outbox_sessions))[0]
+        await outbox.stop()
+        return before, after_first, skipped, after_second
+
+    before, after_first, skipped, after_second = asyncio.run(scenario())
+
+    assert after_first.status == "pending"
+    assert after_first.attempts == 1
+    assert after_first.next_attempt_at >= before + timedelta(seconds=10)
+    assert "451" in after_first.last_error
+    assert skipped == 0
+    assert after_second.status == "failed"
+    assert after_second.attempts == 2
+    assert StubSMTP.sent == []
+    assert outbox.stats()["retried"] == 1
+    assert outbox.stats()["failed"] == 1
+
+
+def test_permanent_failure_is_not_retried(outbox_sessions):
+    outbox = make_outbox(max_attempts=5)
+    StubSMTP.errors = [aiosmtplib.SMTPResponseException(550, "no such user")]
+
+    async def scenario():
+        open_connections(outbox)
+        await outbox.enqueue([WELCOME.render("a@example.com", username="a")])
+        await outbox.drain()
+        await outbox.stop()
+        return await fetch_rows(outbox_sessions)
+
+    [row] = asyncio.run(scenario())
+    assert row.status == "failed"
+    assert row.attempts == 1
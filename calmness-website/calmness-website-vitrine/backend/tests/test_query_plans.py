@@ -0,0 +1,132 @@
+"""EXPLAIN the session and 2FA code lookups against the indexes of
+migration 0001, on synthetic rows inserted in a rolled-back transaction.
+
+Only the choice of index is checked: without a VACUUM (impossible inside the
+transaction) the visibility map is not set, so the planner may pick a plain
+Index Scan where production gets an Index Only Scan.
+"""
+import asyncio
+import json
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+ROWS = 20000
+USERS = 200
+
+FILL = [
+    """
+    INSERT INTO users (email, username, hashed_password, is_active)
+    SELECT 'plan' || g || '@example.com', 'plan_user_' || g, 'x', true
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO user_sessions (user_id, session_token, is_active, expires_at)
+    SELECT u.id, md5(random()::text || g), g % 4 <> 0, now() + (g % 60 - 30) * interval '1 day'
+    FROM generate_series(1, :rows) g
+    JOIN users u ON u.username = 'plan_user_' || (g % :users + 1)
+    """,
+    """
+    INSERT INTO two_factor_codes (user_id, code, code_type, is_used, expires_at)
+    SELECT u.id, lpad((g % 1000000)::text, 6, '0'), CASE WHEN g % 2 = 0 THEN 'sms' ELSE 'email' END,
+           g % 10 <> 0, now() + (g % 20 - 10) * interval '1 minute'
+    FROM generate_series(1, :rows) g
+    JOIN users u ON u.username = 'plan_user_' || (g % :users + 1)
+    """,
+]
+
+# (caller, query, expected index)
+QUERIES = [
+    (
+        "SessionStore.lookup",
+        """
+        SELECT id, user_id, expires_at FROM user_sessions
+        WHERE session_token = :token
+          AND is_active = true AND expires_at > now()
+        """,
+        "ix_user_sessions_active_token",
+    ),
+    (
+        "verify_2fa_code_db",
+        """
+        SELECT * FROM two_factor_codes
+        WHERE user_id = :user_id
+          AND code = '000123' AND code_type = 'sms' AND is_used = false AND expires_at > now()
+        LIMIT 1
+        """,
+        "ix_two_factor_codes_pending",
+    ),
+    (
+        "create_2fa_code",
+        """
+        UPDATE two_factor_codes SET is_used = true
+        WHERE user_id = :user_id
+          AND code_type = 'sms' AND is_used = false
+        """,
+        "ix_two_factor_codes_pending",
+    ),
+    (
+        "revoke_user_sessions",
+        """
+        UPDATE user_sessions SET is_active = false
+        WHERE user_id = :user_id
+          AND is_active = true
+        """,
+        "ix_user_sessions_user_active",
+    ),
+]
+
+TARGET_TABLES = {"user_sessions", "two_factor_codes"}
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+async def explain_all(url):
+    engine = create_async_engine(url, poolclass=NullPool)
+    plans = {}
+    try:
+        async with engine.connect() as conn:
+            trans = await conn.begin()
+            try:
+                missing = (await conn.execute(text(
+                    "SELECT count(*) FROM unnest(CAST(:names AS text[])) n WHERE to_regclass(n) IS NULL"
+                ), {"names": [index for _, _, index in QUERIES]})).scalar_one()
+                if missing:
+                    pytest.skip("auth lookup indexes missing, run `alembic upgrade head`")
+                for sql in FILL:
+                    await conn.execute(text(sql), {"rows": ROWS, "users": USERS})
+                for table in ("users", "user_sessions", "two_factor_codes"):
+                    await conn.execute(text(f"ANALYZE {table}"))
+                probe = (await conn.execute(text(
+                    "SELECT session_token, user_id FROM user_sessions WHERE is_active LIMIT 1"
+                ))).one()
+                params = {"token": probe.session_token, "user_id": probe.user_id}
+                for name, sql, _ in QUERIES:
+                    raw = (await conn.execute(text("EXPLAIN (FORMAT JSON) " + sql), params)).scalar_one()
+                    plans[name] = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            finally:
+                await trans.rollback()
+    finally:
+        await engine.dispose()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans(database_url):
+    return asyncio.run(explain_all(database_url))
+
+
+@pytest.mark.parametrize("name, index", [(name, index) for name, _, index in QUERIES])
+def test_lookup_uses_its_index(plans, name, index):
+    nodes = list(walk(plans[name]))
+    seq_scans = [
+        n["Relation Name"] for n in nodes
+        if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in TARGET_TABLES
+    ]
+    assert not seq_scans, json.dumps(plans[name], indent=2)
+    assert any(n.get("Index Name") == index for n in nodes), json.dumps(plans[name], indent=2)
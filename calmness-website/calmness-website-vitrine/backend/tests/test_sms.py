@@ -0,0 +1,102 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import HTTPException
+from app.core.limiter import TokenBucketLimiter
+from app.core.sms import SMSDispatcher
+
+ACCOUNT = "AC123"
+
+
+def make_dispatcher(handler, **kwargs) -> SMSDispatcher:
+    options = {
+        "account_sid": ACCOUNT,
+        "auth_token": "token",
+        "from_number": "+15550000000",
+        "base_url": "https://sms.test",
+        "timeout": 5.0,
+        "max_connections": 2,
+        "max_per_number": 2,
+        "window": 600.0,
+        "backend": TokenBucketLimiter(),
+        "transport": httpx.MockTransport(handler),
+    }
+    options.update(kwargs)
+    return SMSDispatcher(**options)
+
+
+def run(dispatcher: SMSDispatcher, *sends):
+    async def scenario():
+        try:
+            return [await dispatcher.send(number, body) for number, body in sends]
+        finally:
+            await dispatcher.close()
+    return asyncio.run(scenario())
+
+
+def test_send_posts_message_and_returns_sid():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(201, json={"sid": "SM1"})
+
+    dispatcher = make_dispatcher(handler)
+    assert run(dispatcher, ("+33 6 12 34 56 78", "Code: 123456")) == ["SM1"]
+
+    request = requests[0]
+    assert request.method == "POST"
+    assert request.url.path == f"/2010-04-01/Accounts/{ACCOUNT}/Messages.json"
+    assert request.headers["authorization"].startswith("Basic ")
+    form = dict(httpx.QueryParams(request.content.decode()))
+    assert form == {"To": "+33612345678", "From": "+15550000000", "Body": "Code: 123456"}
+    assert dispatcher.stats() == {"sent": 1, "failed": 0, "throttled": 0}
+
+
+def test_throttles_each_number_after_max_per_number():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(201, json={"sid": f"SM{len(calls)}"})
+
+    dispatcher = make_dispatcher(handler)
+    # Whitespace is stripped before counting, so both spellings share a quota
+    run(dispatcher, ("+33612345678", "a"), ("+33 612 345 678", "b"))
+    with pytest.raises(HTTPException) as exc:
+        run(dispatcher, ("+33612345678", "c"))
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    # Throttled before any request; other numbers are unaffected
+    assert len(calls) == 2
+    assert run(dispatcher, ("+33700000000", "d")) == ["SM3"]
+    assert dispatcher.stats() == {"sent": 3, "failed": 0, "throttled": 1}
+
+
+def test_upstream_error_is_raised_and_counted():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, json={"message": "unavailable"})
+
+    dispatcher = make_dispatcher(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        run(dispatcher, ("+33612345678", "a"))
+    assert dispatcher.stats() == {"sent": 0, "failed": 1, "throttled": 0}
+
+
+def test_network_error_is_raised_and_counted():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    dispatcher = make_dispatcher(handler)
+    with pytest.raises(httpx.ConnectError):
+        run(dispatcher, ("+33612345678", "a"))
+    assert dispatcher.stats()["failed"] == 1
+
+
+def test_missing_configuration_sends_nothing():
+    def handler(request: httpx.Request) -> httpx.Response:
+        pytest.fail("no request expected")
+
+    dispatcher = make_dispatcher(handler, auth_token=None)
+    with pytest.raises(Exception, match="Twilio configuration missing"):
+        run(dispatcher, ("+33612345678", "a"))
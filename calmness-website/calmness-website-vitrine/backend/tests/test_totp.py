@@ -0,0 +1,87 @@
+import pyotp
+import pytest
+from fastapi import HTTPException
+from app.core.totp import TOTPVerifier
+
+SECRET = pyotp.random_base32()
+NOW = 1_700_000_000.0
+
+
+def make_verifier(**kwargs) -> TOTPVerifier:
+    options = {"max_attempts": 3, "attempt_window": 300}
+    options.update(kwargs)
+    return TOTPVerifier(**options)
+
+
+def code_at(secret: str, for_time: float) -> str:
+    return pyotp.TOTP(secret).at(for_time)
+
+
+def test_accepts_current_code():
+    verifier = make_verifier()
+    assert verifier.verify(1, SECRET, code_at(SECRET, NOW), for_time=NOW)
+    assert verifier.stats()["accepted"] == 1
+
+
+def test_accepts_codes_within_valid_window_only():
+    verifier = make_verifier(valid_window=1)
+    assert verifier.verify(1, SECRET, code_at(SECRET, NOW - 30), for_time=NOW)
+    assert not verifier.verify(2, SECRET, code_at(SECRET, NOW - 60), for_time=NOW)
+
+
+def test_rejects_replayed_code():
+    verifier = make_verifier()
+    code = code_at(SECRET, NOW)
+    assert verifier.verify(1, SECRET, code, for_time=NOW)
+    assert not verifier.verify(1, SECRET, code, for_time=NOW + 5)
+    assert verifier.stats()["replayed"] == 1
+
+
+def test_replay_cache_is_per_user():
+    verifier = make_verifier()
+    code = code_at(SECRET, NOW)
+    assert verifier.verify(1, SECRET, code, for_time=NOW)
+    assert verifier.verify(2, SECRET, code, for_time=NOW)
+
+
+def test_rejects_malformed_codes():
+    verifier = make_verifier()
+    assert not verifier.verify(1, SECRET, "12345", for_time=NOW)
+    assert not verifier.verify(1, SECRET, "abcdef", for_time=NOW)
+
+
+def test_throttles_after_max_attempts():
+    verifier = make_verifier(max_attempts=3)
+    wrong = str((int(code_at(SECRET, NOW)) + 1) % 1_000_000).zfill(6)
+    for _ in range(3):
+        assert not verifier.verify(1, SECRET, wrong, for_time=NOW)
+
+    with pytest.raises(HTTPException) as exc_info:
+        # Even the right code is refused while throttled
+        verifier.verify(1, SECRET, code_at(SECRET, NOW), for_time=NOW)
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+    assert verifier.stats()["throttled"] == 1
+
+
+def test_success_resets_failed_attempts():
+    verifier = make_verifier(max_attempts=3)
+    wrong = str((int(code_at(SECRET, NOW)) + 1) % 1_000_000).zfill(6)
+    for _ in range(2):
+        verifier.verify(1, SECRET, wrong, for_time=NOW)
+    assert verifier.verify(1, SECRET, code_at(SECRET, NOW), for_time=NOW)
+    for _ in range(2):
+        verifier.verify(1, SECRET, wrong, for_time=NOW)
+    # Two failures since the success: still below the limit
+    assert verifier.verify(1, SECRET, code_at(SECRET, NOW + 30), for_time=NOW + 30)
+
+
+def test_new_secret_is_used_after_change():
+    verifier = make_verifier()
+    new_secret = pyotp.random_base32()
+    assert verifier.verify(1, SECRET, code_at(SECRET, NOW), for_time=NOW)
+
+    # The cached TOTP of the old secret must not be reused
+    later = NOW + 90
+    assert not verifier.verify(1, new_secret, code_at(SECRET, later), for_time=later)
+    assert verifier.verify(1, new_secret, code_at(new_secret, later), for_time=later)